@@ -0,0 +1,109 @@
+"""Compare the stock FastAPI response path with post_list_response().
+
+Builds a page of synthetic hydrated posts and times, per response:
+
+    stock   validate against List[Post] and encode the way FastAPI does
+            for a handler returning plain dicts
+    fast    shape_post() + orjson, as used by the post list endpoints
+
+Run from the backend directory; no database is needed:
+
+    python benchmark_serialization.py [--posts 1000] [--rounds 50]
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'skillproof_benchmark')
+
+import orjson  # noqa: E402
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+import server  # noqa: E402
+
+
+def make_posts(count: int) -> list:
+    authors = []
+    for i in range(50):
+        authors.append({
+            "id": str(uuid.uuid4()),
+            "email": f"user{i}@example.com",
+            "display_name": f"User {i}",
+            "skill_category": server.DEFAULT_SKILL_CATEGORIES[i % len(server.DEFAULT_SKILL_CATEGORIES)],
+            "avatar_url": f"/uploads/avatars/{i}/0123456789abcdef-sm.webp",
+            "avatar_urls": {"sm": "/a-sm.webp", "md": "/a-md.webp", "lg": "/a-lg.webp"},
+            "created_at": "2025-01-01T00:00:00+00:00",
+            "posts_count": 12,
+            "validations_received": 345,
+        })
+    posts = []
+    for i in range(count):
+        author = authors[i % len(authors)]
+        post_id = str(uuid.uuid4())
+        posts.append({
+            "id": post_id,
+            "user_id": author["id"],
+            "video_filename": f"objects/ab/{post_id}.mp4",
+            "video_url": f"/uploads/objects/ab/{post_id}.mp4",
+            "video_digest": post_id.replace("-", "") * 2,
+            "title": f"Skill demo number {i}",
+            "description": "A short clip showing the technique step by step. " * 4,
+            "skill_category": author["skill_category"],
+            "author_display_name": author["display_name"],
+            "created_at": f"2025-06-01T12:{i // 60 % 60:02d}:{i % 60:02d}+00:00",
+            "validation_count": i % 17,
+            "status": "ready",
+            "video_duration": 42.5,
+            "video_width": 1080,
+            "video_height": 1920,
+            "video_bitrate": 4_000_000,
+            "user": author,
+            "is_validated_by_me": i % 3 == 0,
+        })
+    return posts
+
+
+def stock_response(loop, field, posts: list) -> bytes:
+    content = loop.run_until_complete(serialize_response(field=field, response_content=posts, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def fast_response(posts: list) -> bytes:
+    return server.post_list_response(posts, Response()).body
+
+
+def timed(label: str, rounds: int, fn) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    per_call = (time.perf_counter() - start) / rounds * 1000
+    print(f"{label:>6}: {per_call:8.2f} ms per response")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    route = next(r for r in server.app.routes if getattr(r, "path", None) == "/api/posts" and "GET" in r.methods)
+    posts = make_posts(args.posts)
+    loop = asyncio.new_event_loop()
+
+    if orjson.loads(stock_response(loop, route.response_field, posts)) != orjson.loads(fast_response(posts)):
+        raise SystemExit("Fast path output differs from the stock response")
+
+    print(f"{args.posts} posts, {args.rounds} rounds")
+    stock = timed("stock", args.rounds, lambda: stock_response(loop, route.response_field, posts))
+    fast = timed("fast", args.rounds, lambda: fast_response(posts))
+    print(f"speedup: {stock / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
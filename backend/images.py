@@ -0,0 +1,62 @@
+"""Avatar image processing.
+
+make_avatar_variants() turns an uploaded profile picture into a few small,
+square WebP files. It decodes and resamples with Pillow, so callers run it
+in a worker thread.
+"""
+import os
+from pathlib import Path
+from typing import Dict
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Variant name -> edge length in pixels. "sm" is used wherever avatars are
+# shown in lists (feed, leaderboard), "md" on profile headers, "lg" for
+# high-density screens.
+AVATAR_VARIANTS = {"sm": 96, "md": 256, "lg": 512}
+AVATAR_QUALITY = 80
+
+# Refuse images that would decode to more than this many pixels
+MAX_AVATAR_PIXELS = 40_000_000
+
+
+class ImageError(Exception):
+    """Raised when an uploaded image can't be decoded or is too large."""
+
+
+def _square(image: Image.Image) -> Image.Image:
+    """Center-crop to a square."""
+    width, height = image.size
+    edge = min(width, height)
+    left = (width - edge) // 2
+    top = (height - edge) // 2
+    return image.crop((left, top, left + edge, top + edge))
+
+
+def make_avatar_variants(source: Path, target_dir: Path, version: str) -> Dict[str, str]:
+    """Write every AVATAR_VARIANTS size of source into target_dir.
+
+    Files are named `<version>-<variant>.webp` and written through a
+    temporary name, so a variant URL only ever resolves to a complete file.
+    Returns {variant: filename}.
+    """
+    try:
+        with Image.open(source) as image:
+            if image.width * image.height > MAX_AVATAR_PIXELS:
+                raise ImageError("Image dimensions are too large")
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            square = _square(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ImageError("Unsupported or malformed image") from e
+
+    target_dir.mkdir(parents=True, exist_ok=True)
+    variants = {}
+    for name, edge in AVATAR_VARIANTS.items():
+        resized = square.resize((edge, edge), Image.Resampling.LANCZOS) if square.width > edge else square
+        filename = f"{version}-{name}.webp"
+        temp_path = target_dir / f".{filename}.tmp"
+        resized.save(temp_path, format="WEBP", quality=AVATAR_QUALITY, method=4)
+        os.replace(temp_path, target_dir / filename)
+        variants[name] = filename
+    return variants
@@ -0,0 +1,281 @@
+"""MongoDB index bootstrap for the SkillProof backend.
+
+Every index the API endpoints rely on is declared in INDEXES. The server
+calls ensure_indexes() on startup; the same checks are available from the
+command line (run from the backend directory):
+
+    python indexes.py ensure        # create missing indexes (idempotent)
+    python indexes.py report        # list missing, undeclared and unused indexes
+    python indexes.py check-plans   # fail if a hot query would scan a collection
+
+Setting INDEX_STRICT_MODE=1 makes server startup run the query-plan check
+and refuse to start on a collection scan, which is meant for test runs.
+Startup always fails if an index in REQUIRED_INDEXES could not be built.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_STRICT_MODE = os.environ.get('INDEX_STRICT_MODE', '').lower() in ('1', 'true', 'yes')
+
+# Index declarations, keyed by collection
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="users_id", unique=True),
+        IndexModel([("email", ASCENDING)], name="users_email", unique=True),
+        IndexModel([("author_fanout_pending", ASCENDING)], name="users_author_fanout", sparse=True),
+    ],
+    "posts": [
+        IndexModel([("id", ASCENDING)], name="posts_id", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="posts_feed"),
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="posts_user_feed"
+        ),
+        IndexModel(
+            [("skill_category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="posts_category_feed"
+        ),
+        IndexModel(
+            [("title", TEXT), ("description", TEXT), ("author_display_name", TEXT)],
+            weights={"title": 10, "author_display_name": 5, "description": 1},
+            name="posts_text_search"
+        ),
+    ],
+    "validations": [
+        IndexModel([("post_id", ASCENDING), ("user_id", ASCENDING)], name="validations_post_user", unique=True),
+    ],
+    "blobs": [
+        IndexModel([("digest", ASCENDING)], name="blobs_digest", unique=True),
+        IndexModel([("refcount", ASCENDING), ("released_at", ASCENDING)], name="blobs_gc"),
+    ],
+    "upload_sessions": [
+        IndexModel([("id", ASCENDING)], name="upload_sessions_id", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="upload_sessions_expiry"),
+    ],
+}
+
+# Unique indexes that enforce invariants the endpoints rely on instead of
+# checking first; the server refuses to start without them
+REQUIRED_INDEXES = {
+    "validations": ["validations_post_user"],
+}
+
+# Representative shapes of the queries issued by the endpoints. Each one must
+# be answered from an index; check_query_plans() explains them against the
+# live database.
+QUERY_SHAPES = [
+    ("users", {"id": "x"}, None),
+    ("users", {"id": {"$in": ["x", "y"]}}, None),
+    ("users", {"email": "x"}, None),
+    ("users", {"author_fanout_pending": True}, None),
+    ("posts", {"id": "x"}, None),
+    ("posts", {"id": {"$in": ["x", "y"]}}, None),
+    ("posts", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("posts", {"user_id": "x"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("posts", {"skill_category": "x"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("posts", {"$text": {"$search": "x"}}, None),
+    ("posts", {"user_id": "x", "author.rev": {"$ne": "x"}}, None),
+    ("validations", {"post_id": "x", "user_id": "x"}, None),
+    ("validations", {"post_id": {"$in": ["x", "y"]}, "user_id": "x"}, None),
+    ("blobs", {"digest": "x"}, None),
+    ("blobs", {"refcount": {"$lte": 0}, "released_at": {"$lt": "x"}}, None),
+    ("upload_sessions", {"id": "x", "user_id": "x"}, None),
+    ("upload_sessions", {"expires_at": {"$lt": "x"}}, None),
+]
+
+
+class IndexBootstrapError(Exception):
+    """Raised when declared indexes cannot be created or are not used."""
+
+
+async def _index_names(db, collection: str) -> set:
+    return {index["name"] async for index in db[collection].list_indexes()}
+
+
+async def dedupe_validations(db) -> int:
+    """Delete duplicate (post_id, user_id) validations and recount what they inflated.
+
+    Validations written before the unique validations_post_user index
+    existed may hold duplicates, which keep that index from being built.
+    The earliest validation of each pair is kept, and validation_count and
+    validations_received are recomputed for the affected posts and their
+    authors. Returns the number of validations deleted.
+    """
+    duplicates = db.validations.aggregate([
+        {"$sort": {"created_at": 1}},
+        {"$group": {
+            "_id": {"post_id": "$post_id", "user_id": "$user_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    extra_ids, post_ids = [], set()
+    async for group in duplicates:
+        extra_ids.extend(group["ids"][1:])
+        post_ids.add(group["_id"]["post_id"])
+    if not extra_ids:
+        return 0
+
+    await db.validations.delete_many({"_id": {"$in": extra_ids}})
+    author_ids = set()
+    for post_id in post_ids:
+        count = await db.validations.count_documents({"post_id": post_id})
+        post = await db.posts.find_one_and_update(
+            {"id": post_id}, {"$set": {"validation_count": count}}, projection={"_id": 0, "user_id": 1}
+        )
+        if post:
+            author_ids.add(post["user_id"])
+    for author_id in author_ids:
+        author_post_ids = await db.posts.distinct("id", {"user_id": author_id})
+        received = await db.validations.count_documents({"post_id": {"$in": author_post_ids}})
+        await db.users.update_one({"id": author_id}, {"$set": {"validations_received": received}})
+    logger.warning(f"Deleted {len(extra_ids)} duplicate validations on {len(post_ids)} posts")
+    return len(extra_ids)
+
+
+async def ensure_indexes(db):
+    """Create every declared index. Safe to call on every startup."""
+    # Only needed until the unique index exists, which then prevents duplicates
+    if "validations_post_user" not in await _index_names(db, "validations"):
+        await dedupe_validations(db)
+
+    failures = []
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # Typically an existing index with the same name but different
+            # options, or duplicate data blocking a unique index
+            logger.error(f"Could not create indexes on {collection}: {e}")
+            failures.append(collection)
+    if failures:
+        raise IndexBootstrapError(f"Index creation failed for: {', '.join(failures)}")
+
+
+async def index_report(db) -> dict:
+    """Compare declared indexes with the live database.
+
+    Returns, per collection, the declared indexes that are missing, the
+    indexes present but not declared here, and the indexes that have not
+    served a single operation since the server last restarted.
+    """
+    report = {}
+    for collection, models in INDEXES.items():
+        declared = {model.document["name"] for model in models}
+        existing = await _index_names(db, collection)
+
+        unused = []
+        try:
+            async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0:
+                    unused.append(stat["name"])
+        except OperationFailure as e:
+            logger.warning(f"$indexStats unavailable for {collection}: {e}")
+
+        report[collection] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared - {"_id_"}),
+            "unused": sorted(unused),
+        }
+    return report
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def check_query_plans(db):
+    """Explain every entry in QUERY_SHAPES and raise on a collection scan."""
+    scans = []
+    for collection, query, sort in QUERY_SHAPES:
+        command = {"find": collection, "filter": query, "limit": 1}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in set(_plan_stages(winning_plan)):
+            scans.append(f"{collection} {query} sort={sort}")
+    if scans:
+        raise IndexBootstrapError("Collection scan in query plan: " + "; ".join(scans))
+
+
+async def bootstrap_indexes(db):
+    """Startup hook: ensure indexes, log drift, and check plans in strict mode.
+
+    Raises IndexBootstrapError, whatever the mode, when a REQUIRED_INDEXES
+    entry is missing.
+    """
+    try:
+        await ensure_indexes(db)
+    except IndexBootstrapError as e:
+        if INDEX_STRICT_MODE:
+            raise
+        logger.error(str(e))
+
+    report = await index_report(db)
+    for collection, entry in report.items():
+        if entry["missing"]:
+            logger.warning(f"Missing indexes on {collection}: {entry['missing']}")
+        if entry["undeclared"]:
+            logger.info(f"Undeclared indexes on {collection}: {entry['undeclared']}")
+
+    missing_required = [
+        f"{collection}.{name}"
+        for collection, names in REQUIRED_INDEXES.items()
+        for name in names if name in report[collection]["missing"]
+    ]
+    if missing_required:
+        raise IndexBootstrapError(f"Required indexes are missing: {', '.join(missing_required)}")
+
+    if INDEX_STRICT_MODE:
+        await check_query_plans(db)
+
+
+async def _run_cli(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if command == "ensure":
+            await ensure_indexes(db)
+            print("All declared indexes are present")
+        elif command == "report":
+            report = await index_report(db)
+            for collection, entry in report.items():
+                print(f"{collection}:")
+                for key in ("missing", "undeclared", "unused"):
+                    print(f"  {key}: {', '.join(entry[key]) or '-'}")
+        elif command == "check-plans":
+            await check_query_plans(db)
+            print("No collection scans in query plans")
+    except IndexBootstrapError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage SkillProof MongoDB indexes")
+    parser.add_argument("command", choices=["ensure", "report", "check-plans"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_run_cli(args.command)))
@@ -0,0 +1,548 @@
+"""Pure-Python helpers for uploaded video files.
+
+faststart() rewrites an MP4/QuickTime file so its `moov` box (the index
+the player needs before it can decode anything) sits in front of the
+`mdat` media data. Phones usually write `moov` last, which makes browsers
+fetch the tail of the file before playback can begin.
+
+VideoInspector validates an MP4 or WebM upload incrementally while its
+bytes arrive, so oversized, overlong or malformed files are rejected
+without first being written out in full. inspect_ranges() applies the same
+checks to a file stored elsewhere, fetching only its box headers and moov
+(or its WebM headers) with ranged reads.
+"""
+import os
+import struct
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+COPY_CHUNK_SIZE = 1024 * 1024
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+# Largest chunk offset an stco table can hold; beyond it the table must be co64
+MAX_STCO_OFFSET = 0xFFFFFFFF
+
+WEBM_HEADER_LIMIT = 1024 * 1024
+DURATION_TOLERANCE_SECONDS = 1.0
+
+# A well-formed MP4 has a handful of top-level boxes; refuse to walk more
+# with ranged reads
+MAX_TOP_LEVEL_BOXES = 256
+
+# Boxes on the path from moov down to the chunk offset tables
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# Boxes an MP4/QuickTime file may start with
+MP4_LEADING_BOXES = {b"ftyp", b"wide", b"free", b"skip"}
+
+# Matroska/WebM element ids
+EBML_HEADER = 0x1A45DFA3
+EBML_SEGMENT = 0x18538067
+EBML_CLUSTER = 0x1F43B675
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TRACKS = 0x1654AE6B
+EBML_TRACK_ENTRY = 0xAE
+EBML_TRACK_TYPE = 0x83
+EBML_VIDEO = 0xE0
+EBML_PIXEL_WIDTH = 0xB0
+EBML_PIXEL_HEIGHT = 0xBA
+
+
+class MediaError(Exception):
+    """Raised when a file is not a well-formed media container."""
+
+
+def read_box_header(data: bytes, offset: int = 0):
+    """Return (box type, total size, header size) for the box at offset.
+
+    A size of None means the box extends to the end of the file.
+    """
+    if len(data) - offset < 8:
+        raise MediaError("Truncated box header")
+    size, box_type = struct.unpack_from(">I4s", data, offset)
+    header_size = 8
+    if size == 1:
+        if len(data) - offset < 16:
+            raise MediaError("Truncated box header")
+        size = struct.unpack_from(">Q", data, offset + 8)[0]
+        header_size = 16
+    elif size == 0:
+        size = None
+    if size is not None and size < header_size:
+        raise MediaError(f"Invalid size for box {box_type!r}")
+    return box_type, size, header_size
+
+
+def scan_top_level_boxes(path: Path):
+    """List (type, offset, size) for every top-level box of the file."""
+    boxes = []
+    file_size = path.stat().st_size
+    with open(path, "rb") as f:
+        offset = 0
+        while offset < file_size:
+            f.seek(offset)
+            box_type, size, _ = read_box_header(f.read(16).ljust(8, b"\0"))
+            if size is None:
+                size = file_size - offset
+            if offset + size > file_size:
+                raise MediaError(f"Box {box_type!r} runs past the end of the file")
+            boxes.append((box_type, offset, size))
+            offset += size
+    return boxes
+
+
+class _Box:
+    def __init__(self, box_type: bytes, payload: bytes = b"", children=None):
+        self.type = box_type
+        self.payload = payload
+        self.children = children
+        self.offsets = None
+        self.offsets_64bit = box_type == b"co64"
+
+    def serialize(self) -> bytes:
+        if self.offsets is not None:
+            version_flags = self.payload[:4]
+            fmt = ">Q" if self.offsets_64bit else ">I"
+            body = version_flags + struct.pack(">I", len(self.offsets)) + b"".join(
+                struct.pack(fmt, o) for o in self.offsets
+            )
+            box_type = b"co64" if self.offsets_64bit else b"stco"
+        elif self.children is not None:
+            body = b"".join(child.serialize() for child in self.children)
+            box_type = self.type
+        else:
+            body = self.payload
+            box_type = self.type
+        size = len(body) + 8
+        if size > 0xFFFFFFFF:
+            return struct.pack(">I4sQ", 1, box_type, size + 8) + body
+        return struct.pack(">I4s", size, box_type) + body
+
+
+def _parse_boxes(data: bytes, chunk_tables: list) -> list:
+    boxes = []
+    offset = 0
+    while offset < len(data):
+        box_type, size, header_size = read_box_header(data, offset)
+        if size is None:
+            size = len(data) - offset
+        if offset + size > len(data):
+            raise MediaError(f"Box {box_type!r} runs past its parent")
+        payload = data[offset + header_size:offset + size]
+        if box_type in CONTAINER_BOXES:
+            box = _Box(box_type, children=_parse_boxes(payload, chunk_tables))
+        else:
+            box = _Box(box_type, payload)
+            if box_type in (b"stco", b"co64"):
+                if len(payload) < 8:
+                    raise MediaError("Truncated chunk offset table")
+                count = struct.unpack_from(">I", payload, 4)[0]
+                entry_size = 8 if box_type == b"co64" else 4
+                if len(payload) < 8 + count * entry_size:
+                    raise MediaError("Truncated chunk offset table")
+                fmt = ">Q" if box_type == b"co64" else ">I"
+                box.offsets = [struct.unpack_from(fmt, payload, 8 + i * entry_size)[0] for i in range(count)]
+                chunk_tables.append(box)
+            elif box_type == b"cmov":
+                raise MediaError("Compressed movie headers are not supported")
+        boxes.append(box)
+        offset += size
+    return boxes
+
+
+def _copy_range(src, dst, start: int, length: int):
+    src.seek(start)
+    while length > 0:
+        chunk = src.read(min(COPY_CHUNK_SIZE, length))
+        if not chunk:
+            raise MediaError("Unexpected end of file while copying")
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def faststart(path: Path) -> bool:
+    """Move the moov box of an MP4 ahead of its media data, in place.
+
+    The file is streamed into a temporary sibling and renamed over the
+    original, so only the moov box is ever held in memory. Chunk offsets
+    are adjusted for the move, upgrading stco tables to co64 when an offset
+    no longer fits in 32 bits. Returns True if the file was rewritten and
+    False if it already starts with moov; raises MediaError for files that
+    aren't MP4s or can't be rewritten safely.
+    """
+    boxes = scan_top_level_boxes(path)
+    if not boxes or boxes[0][0] != b"ftyp":
+        raise MediaError("Not an MP4 file")
+    moov = next((box for box in boxes if box[0] == b"moov"), None)
+    first_mdat = next((box for box in boxes if box[0] == b"mdat"), None)
+    if moov is None or first_mdat is None:
+        raise MediaError("MP4 file has no moov or mdat box")
+    if moov[1] < first_mdat[1]:
+        return False
+    if moov[2] > MAX_MOOV_BYTES:
+        raise MediaError("moov box is too large to relocate")
+
+    _, moov_offset, moov_size = moov
+    insert_at = first_mdat[1]
+    with open(path, "rb") as f:
+        f.seek(moov_offset)
+        moov_data = f.read(moov_size)
+    chunk_tables = []
+    moov_box = _parse_boxes(moov_data, chunk_tables)[0]
+    original_offsets = [list(table.offsets) for table in chunk_tables]
+
+    # Shifting the data can push offsets past 32 bits, which grows the moov
+    # box again; repeat until the layout is stable (at most a few passes).
+    while True:
+        new_moov = moov_box.serialize()
+        new_size = len(new_moov)
+        upgraded = False
+        for table, offsets in zip(chunk_tables, original_offsets):
+            shifted = []
+            for offset in offsets:
+                if offset < insert_at:
+                    shifted.append(offset)
+                elif offset < moov_offset:
+                    shifted.append(offset + new_size)
+                else:
+                    shifted.append(offset + new_size - moov_size)
+            table.offsets = shifted
+            if not table.offsets_64bit and shifted and max(shifted) > MAX_STCO_OFFSET:
+                table.offsets_64bit = True
+                upgraded = True
+        if not upgraded and len(moov_box.serialize()) == new_size:
+            new_moov = moov_box.serialize()
+            break
+
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.faststart")
+    try:
+        with open(path, "rb") as src, open(temp_path, "wb") as dst:
+            _copy_range(src, dst, 0, insert_at)
+            dst.write(new_moov)
+            _copy_range(src, dst, insert_at, moov_offset - insert_at)
+            end = moov_offset + moov_size
+            _copy_range(src, dst, end, path.stat().st_size - end)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def _find_child(box: _Box, box_type: bytes):
+    return next((child for child in box.children or [] if child.type == box_type), None)
+
+
+def _read_mp4_metadata(moov_data: bytes) -> dict:
+    moov = _parse_boxes(moov_data, [])[0]
+    metadata = {"container": "mp4", "duration_seconds": None, "width": None, "height": None}
+
+    mvhd = _find_child(moov, b"mvhd")
+    if mvhd is None or len(mvhd.payload) < 20:
+        raise MediaError("MP4 file has no movie header")
+    if mvhd.payload[0] == 1:
+        if len(mvhd.payload) < 32:
+            raise MediaError("Truncated movie header")
+        timescale, duration = struct.unpack_from(">IQ", mvhd.payload, 20)
+        unknown = 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack_from(">II", mvhd.payload, 12)
+        unknown = 0xFFFFFFFF
+    if timescale and duration != unknown:
+        metadata["duration_seconds"] = duration / timescale
+
+    for trak in moov.children:
+        if trak.type != b"trak":
+            continue
+        mdia = _find_child(trak, b"mdia")
+        hdlr = _find_child(mdia, b"hdlr") if mdia else None
+        tkhd = _find_child(trak, b"tkhd")
+        if hdlr and hdlr.payload[8:12] == b"vide" and tkhd and len(tkhd.payload) >= 8:
+            width, height = struct.unpack_from(">II", tkhd.payload, len(tkhd.payload) - 8)
+            metadata["width"], metadata["height"] = width >> 16, height >> 16
+            break
+    return metadata
+
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool):
+    """Read an EBML variable-length integer; returns (value, length, all_ones) or None."""
+    if pos >= len(data):
+        return None
+    first = data[pos]
+    if first == 0:
+        raise MediaError("Invalid EBML variable-length integer")
+    length = 8 - first.bit_length() + 1
+    if pos + length > len(data):
+        return None
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    all_ones = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, all_ones
+
+
+def _read_ebml_element(data: bytes, pos: int):
+    """Return (id, payload start, payload size or None if unknown) or None."""
+    element_id = _read_vint(data, pos, keep_marker=True)
+    if element_id is None:
+        return None
+    size = _read_vint(data, pos + element_id[1], keep_marker=False)
+    if size is None:
+        return None
+    start = pos + element_id[1] + size[1]
+    return element_id[0], start, None if size[2] else size[0]
+
+
+def _iter_ebml_children(data: bytes):
+    pos = 0
+    while pos < len(data):
+        element = _read_ebml_element(data, pos)
+        if element is None or element[2] is None or element[1] + element[2] > len(data):
+            raise MediaError("Malformed WebM header element")
+        element_id, start, size = element
+        yield element_id, data[start:start + size]
+        pos = start + size
+
+
+def _ebml_uint(payload: bytes) -> int:
+    return int.from_bytes(payload, "big") if payload else 0
+
+
+def _parse_webm_header(data: bytes) -> Optional[dict]:
+    """Parse WebM headers from the start of a file; None means more bytes are needed."""
+    header = _read_ebml_element(data, 0)
+    if header is None:
+        return None
+    if header[0] != EBML_HEADER or header[2] is None:
+        raise MediaError("Not a WebM file")
+    segment = _read_ebml_element(data, header[1] + header[2])
+    if segment is None:
+        return None
+    if segment[0] != EBML_SEGMENT:
+        raise MediaError("WebM file has no segment")
+
+    metadata = {"container": "webm", "duration_seconds": None, "width": None, "height": None}
+    info_seen = tracks_seen = False
+    pos = segment[1]
+    while not (info_seen and tracks_seen):
+        element = _read_ebml_element(data, pos)
+        if element is None:
+            return None
+        element_id, start, size = element
+        if element_id == EBML_CLUSTER:
+            break
+        if size is None:
+            raise MediaError("Unknown-size WebM element before first cluster")
+        if start + size > len(data):
+            return None
+        payload = data[start:start + size]
+        if element_id == EBML_INFO:
+            info_seen = True
+            timecode_scale, duration = 1000000, None
+            for child_id, child in _iter_ebml_children(payload):
+                if child_id == EBML_TIMECODE_SCALE:
+                    timecode_scale = _ebml_uint(child)
+                elif child_id == EBML_DURATION and len(child) in (4, 8):
+                    duration = struct.unpack(">f" if len(child) == 4 else ">d", child)[0]
+            if duration is not None:
+                metadata["duration_seconds"] = duration * timecode_scale / 1e9
+        elif element_id == EBML_TRACKS:
+            tracks_seen = True
+            for entry_id, entry in _iter_ebml_children(payload):
+                if entry_id != EBML_TRACK_ENTRY:
+                    continue
+                fields = dict(_iter_ebml_children(entry))
+                if _ebml_uint(fields.get(EBML_TRACK_TYPE, b"")) == 1 and EBML_VIDEO in fields:
+                    video = dict(_iter_ebml_children(fields[EBML_VIDEO]))
+                    metadata["width"] = _ebml_uint(video.get(EBML_PIXEL_WIDTH, b"")) or None
+                    metadata["height"] = _ebml_uint(video.get(EBML_PIXEL_HEIGHT, b"")) or None
+                    break
+        pos = start + size
+    if not info_seen:
+        raise MediaError("WebM file has no segment info")
+    return metadata
+
+
+def _check_duration(metadata: dict, max_duration_seconds: float):
+    duration = metadata.get("duration_seconds")
+    if duration is not None and duration > max_duration_seconds + DURATION_TOLERANCE_SECONDS:
+        raise MediaError(f"Video is longer than {max_duration_seconds:g} seconds")
+
+
+def _final_metadata(metadata: dict, total_bytes: int, max_duration_seconds: float) -> dict:
+    _check_duration(metadata, max_duration_seconds)
+    metadata = dict(metadata)
+    duration = metadata["duration_seconds"]
+    metadata["bitrate"] = int(total_bytes * 8 / duration) if duration else None
+    return metadata
+
+
+class VideoInspector:
+    """Validates an MP4 or WebM upload chunk by chunk.
+
+    feed() every chunk as it arrives and call finish() after the last one.
+    Either raises MediaError as soon as the stream is known to be bad:
+    larger than max_bytes, longer than max_duration_seconds, or not a
+    well-formed MP4/WebM container. finish() returns the container type,
+    duration, resolution and average bitrate.
+    """
+
+    def __init__(self, max_bytes: int, max_duration_seconds: float):
+        self.max_bytes = max_bytes
+        self.max_duration_seconds = max_duration_seconds
+        self.container = None
+        self.metadata = None
+        self.result = None
+        self.total_bytes = 0
+        self._buffer = bytearray()
+        self._skip = 0
+        self._box_count = 0
+        self._moov = None
+        self._moov_remaining = 0
+        self._to_end = False
+
+    def feed(self, chunk: bytes):
+        self.total_bytes += len(chunk)
+        if self.total_bytes > self.max_bytes:
+            raise MediaError(f"Video exceeds the {self.max_bytes} byte size limit")
+
+        if self.container is None:
+            self._buffer += chunk
+            if len(self._buffer) < 8:
+                return
+            if self._buffer[:4] == b"\x1a\x45\xdf\xa3":
+                self.container = "webm"
+            elif bytes(self._buffer[4:8]) in MP4_LEADING_BOXES:
+                self.container = "mp4"
+            else:
+                raise MediaError("Unsupported or malformed video file")
+            data, self._buffer = bytes(self._buffer), bytearray()
+        else:
+            data = chunk
+
+        if self.container == "webm":
+            self._feed_webm(data)
+        else:
+            self._feed_mp4(data)
+
+    def _feed_webm(self, data: bytes):
+        if self.metadata is not None:
+            return
+        self._buffer += data
+        metadata = _parse_webm_header(bytes(self._buffer))
+        if metadata is None:
+            if len(self._buffer) > WEBM_HEADER_LIMIT:
+                raise MediaError("WebM headers are too large or malformed")
+            return
+        self.metadata = metadata
+        self._buffer = bytearray()
+        _check_duration(self.metadata, self.max_duration_seconds)
+
+    def _feed_mp4(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            if self._to_end:
+                return
+            if self._moov is not None:
+                taken = view[:self._moov_remaining]
+                self._moov += taken
+                self._moov_remaining -= len(taken)
+                view = view[len(taken):]
+                if self._moov_remaining == 0:
+                    self.metadata = _read_mp4_metadata(bytes(self._moov))
+                    self._moov = None
+                    _check_duration(self.metadata, self.max_duration_seconds)
+                continue
+            if self._skip:
+                skipped = min(self._skip, len(view))
+                self._skip -= skipped
+                view = view[skipped:]
+                continue
+
+            # At a top-level box boundary; wait for a complete header
+            self._buffer += view
+            view = memoryview(b"")
+            if len(self._buffer) < 8 or (
+                struct.unpack_from(">I", self._buffer)[0] == 1 and len(self._buffer) < 16
+            ):
+                return
+            box_type, size, _ = read_box_header(bytes(self._buffer[:16]))
+            if not all(0x20 <= byte < 0x7F for byte in box_type):
+                raise MediaError("Malformed MP4 box structure")
+            if self._box_count == 0 and box_type not in MP4_LEADING_BOXES:
+                raise MediaError("Not an MP4 file")
+            self._box_count += 1
+            rest, self._buffer = bytes(self._buffer), bytearray()
+            if size is None:
+                # Box runs to the end of the file (typically the last mdat)
+                self._to_end = True
+                return
+            if box_type == b"moov":
+                if size > MAX_MOOV_BYTES:
+                    raise MediaError("moov box is too large")
+                self._moov = bytearray()
+                self._moov_remaining = size
+            else:
+                self._skip = size
+            view = memoryview(rest)
+
+    def finish(self) -> dict:
+        """Validate the complete stream and return (and keep in .result) its metadata."""
+        if self.container is None:
+            raise MediaError("Unsupported or malformed video file")
+        if self.container == "mp4" and (self._skip or self._moov is not None or self._buffer):
+            raise MediaError("Truncated MP4 file")
+        if self.metadata is None:
+            raise MediaError(f"Truncated or malformed {self.container.upper()} file")
+        self.result = _final_metadata(self.metadata, self.total_bytes, self.max_duration_seconds)
+        return self.result
+
+
+async def inspect_ranges(read_range: Callable[[int, int], Awaitable[bytes]], size: int,
+                         max_bytes: int, max_duration_seconds: float) -> dict:
+    """Validate a stored video of size bytes without reading its media data.
+
+    read_range(start, length) returns that byte range of the file. An MP4
+    is walked one top-level box header at a time and only its moov box is
+    read in full, wherever it sits; a WebM needs just its leading headers.
+    Applies the same checks as VideoInspector and returns the same metadata.
+    """
+    if size > max_bytes:
+        raise MediaError(f"Video exceeds the {max_bytes} byte size limit")
+    head = await read_range(0, min(size, 16))
+    if len(head) < 8:
+        raise MediaError("Unsupported or malformed video file")
+
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        metadata = _parse_webm_header(await read_range(0, min(size, WEBM_HEADER_LIMIT)))
+        if metadata is None:
+            raise MediaError("Truncated or malformed WEBM file")
+    elif head[4:8] in MP4_LEADING_BOXES:
+        metadata = None
+        offset = boxes = 0
+        while offset < size:
+            boxes += 1
+            if boxes > MAX_TOP_LEVEL_BOXES:
+                raise MediaError("Malformed MP4 box structure")
+            header = head if offset == 0 else await read_range(offset, min(size - offset, 16))
+            box_type, box_size, _ = read_box_header(header)
+            if not all(0x20 <= byte < 0x7F for byte in box_type):
+                raise MediaError("Malformed MP4 box structure")
+            if box_size is None:
+                box_size = size - offset
+            if offset + box_size > size:
+                raise MediaError("Truncated MP4 file")
+            if box_type == b"moov":
+                if box_size > MAX_MOOV_BYTES:
+                    raise MediaError("moov box is too large")
+                metadata = _read_mp4_metadata(await read_range(offset, box_size))
+                _check_duration(metadata, max_duration_seconds)
+            offset += box_size
+        if metadata is None:
+            raise MediaError("Truncated or malformed MP4 file")
+    else:
+        raise MediaError("Unsupported or malformed video file")
+    return _final_metadata(metadata, size, max_duration_seconds)
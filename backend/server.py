@@ -1,23 +1,43 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, status, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse, RedirectResponse
+from fastapi.responses import FileResponse, ORJSONResponse, RedirectResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import ClientDisconnect
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 from passlib.context import CryptContext
 import jwt
-import shutil
+import re
+import json
+import base64
+import hashlib
+import bisect
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 import mimetypes
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+import aiofiles
+import aiofiles.os
+import boto3
 import cloudinary
-import cloudinary.uploader
+from indexes import bootstrap_indexes
+from images import ImageError, make_avatar_variants
+from media import MediaError, VideoInspector, faststart, inspect_ranges
+from storage import CloudinaryStorage, LocalStorage, S3Storage, StorageError
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -42,7 +62,18 @@ client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min and max to the configured cost makes needs_update() flag hashes
+# made with any other cost, so they are upgraded (or downgraded) on login.
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_WAITING = int(os.environ.get('PASSWORD_HASH_MAX_WAITING', '64'))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
 
 # JWT settings
 JWT_SECRET = os.environ.get('JWT_SECRET', 'skillproof-secret-key-change-in-production')
@@ -72,18 +103,325 @@ DEFAULT_SKILL_CATEGORIES = [
     "Other"
 ]
 
+# Media serving settings
+MEDIA_READ_CHUNK_SIZE = int(os.environ.get('MEDIA_READ_CHUNK_SIZE', str(256 * 1024)))
+MAX_RANGES_PER_REQUEST = 16
+MEDIA_HEAD_CACHE_BYTES = int(os.environ.get('MEDIA_HEAD_CACHE_BYTES', str(64 * 1024 * 1024)))
+MEDIA_HEAD_SEGMENT_BYTES = int(os.environ.get('MEDIA_HEAD_SEGMENT_BYTES', str(512 * 1024)))
+
+# Upload persistence settings
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+MAX_VIDEO_BYTES = int(os.environ.get('MAX_VIDEO_BYTES', str(200 * 1024 * 1024)))
+MAX_AVATAR_BYTES = int(os.environ.get('MAX_AVATAR_BYTES', str(10 * 1024 * 1024)))
+AVATAR_LIST_VARIANT = "sm"
+AVATAR_PROFILE_VARIANT = "md"
+MAX_VIDEO_DURATION_SECONDS = float(os.environ.get('MAX_VIDEO_DURATION_SECONDS', '60'))
+
+# Background cloud upload settings
+SPOOL_DIR = ROOT_DIR / "spool"
+SPOOL_DIR.mkdir(exist_ok=True)
+USE_FAKE_UPLOADER = os.environ.get('USE_FAKE_UPLOADER', '').lower() in ('1', 'true', 'yes')
+FAKE_UPLOAD_DELAY_SECONDS = float(os.environ.get('FAKE_UPLOAD_DELAY_SECONDS', '0'))
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', '2'))
+UPLOAD_QUEUE_MAX_SIZE = int(os.environ.get('UPLOAD_QUEUE_MAX_SIZE', '100'))
+UPLOAD_MAX_ATTEMPTS = int(os.environ.get('UPLOAD_MAX_ATTEMPTS', '4'))
+UPLOAD_RETRY_BASE_SECONDS = float(os.environ.get('UPLOAD_RETRY_BASE_SECONDS', '2'))
+
+# Storage backend settings: "local" keeps videos in the blob store under
+# UPLOADS_DIR, "cloudinary" and "s3" publish them through the upload queue
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'cloudinary' if USE_CLOUDINARY else 'local').lower()
+S3_BUCKET = os.environ.get('S3_BUCKET', '')
+S3_REGION = os.environ.get('S3_REGION') or None
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+S3_KEY_PREFIX = os.environ.get('S3_KEY_PREFIX', 'skillproof/videos')
+S3_PUBLIC_BASE_URL = os.environ.get('S3_PUBLIC_BASE_URL') or None
+S3_MULTIPART_PART_BYTES = int(os.environ.get('S3_MULTIPART_PART_BYTES', str(8 * 1024 * 1024)))
+S3_MULTIPART_CONCURRENCY = int(os.environ.get('S3_MULTIPART_CONCURRENCY', '4'))
+S3_PRESIGN_EXPIRES_SECONDS = int(os.environ.get('S3_PRESIGN_EXPIRES_SECONDS', '3600'))
+
+# Resumable upload settings
+PARTIAL_UPLOADS_DIR = SPOOL_DIR / "partial"
+PARTIAL_UPLOADS_DIR.mkdir(exist_ok=True)
+UPLOAD_SESSION_TTL_SECONDS = float(os.environ.get('UPLOAD_SESSION_TTL_SECONDS', str(24 * 3600)))
+UPLOAD_SESSION_SWEEP_INTERVAL_SECONDS = float(os.environ.get('UPLOAD_SESSION_SWEEP_INTERVAL_SECONDS', '900'))
+UPLOAD_OFFSET_HEADER = "Upload-Offset"
+UPLOAD_LENGTH_HEADER = "Upload-Length"
+
+# Post processing states. Posts without a status predate background uploads
+# and are ready.
+POST_STATUS_PROCESSING = "processing"
+POST_STATUS_READY = "ready"
+POST_STATUS_FAILED = "failed"
+VISIBLE_POSTS_FILTER = {"status": {"$nin": [POST_STATUS_PROCESSING, POST_STATUS_FAILED]}}
+
+# Content-addressed video storage settings
+BLOB_GC_GRACE_SECONDS = float(os.environ.get('BLOB_GC_GRACE_SECONDS', '3600'))
+BLOB_GC_INTERVAL_SECONDS = float(os.environ.get('BLOB_GC_INTERVAL_SECONDS', '3600'))
+
+# Write-behind counter settings
+COUNTER_FLUSH_INTERVAL_SECONDS = float(os.environ.get('COUNTER_FLUSH_INTERVAL_SECONDS', '1.0'))
+COUNTER_FLUSH_MAX_PENDING = int(os.environ.get('COUNTER_FLUSH_MAX_PENDING', '500'))
+
+# Author profile cache settings
+PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get('PROFILE_CACHE_MAX_ENTRIES', '10000'))
+PROFILE_CACHE_TTL_SECONDS = float(os.environ.get('PROFILE_CACHE_TTL_SECONDS', '300'))
+
+# Shared feed page cache settings
+FEED_CACHE_MAX_ENTRIES = int(os.environ.get('FEED_CACHE_MAX_ENTRIES', '256'))
+
+# Author snapshot fan-out settings
+AUTHOR_FANOUT_BATCH_SIZE = int(os.environ.get('AUTHOR_FANOUT_BATCH_SIZE', '500'))
+
+# Feed pagination settings
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 100
+
+# Batch lookup settings
+MAX_BATCH_IDS = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 # Create the main app
 app = FastAPI()
 
 # Create API router
 api_router = APIRouter(prefix="/api")
 
+# Media serving helpers
+def file_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def parse_range_header(value: str, file_size: int) -> Optional[List[tuple]]:
+    """Parse a Range header into sorted, coalesced inclusive (start, end) pairs.
+
+    Returns None when the header is malformed or asks for more than
+    MAX_RANGES_PER_REQUEST ranges (the range is then ignored and the full
+    file served), and an empty list when no range is satisfiable.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    
+    ranges = []
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    if not parts or len(parts) > MAX_RANGES_PER_REQUEST:
+        return None
+    for part in parts:
+        first, sep, last = part.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # Suffix range: the final N bytes
+            if not last:
+                return None
+            length = int(last)
+            if length == 0 or file_size == 0:
+                continue
+            ranges.append((max(file_size - length, 0), file_size - 1))
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            if start >= file_size:
+                continue
+            end = min(int(last), file_size - 1) if last else file_size - 1
+            ranges.append((start, end))
+    
+    # Coalesce overlapping and adjacent ranges
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _http_date_to_timestamp(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of etag against the request's If-None-Match list."""
+    tags = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since for a GET or HEAD."""
+    if request.headers.get("if-none-match") is not None:
+        return etag_matches(request, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        since = _http_date_to_timestamp(if_modified_since)
+        return since is not None and int(mtime) <= since
+    return False
+
+def if_range_matches(request: Request, etag: str, mtime: float) -> bool:
+    """True when a Range header may be honoured under If-Range."""
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Ranges require a strong comparison
+        return if_range == etag
+    since = _http_date_to_timestamp(if_range)
+    return since is not None and int(mtime) <= since
+
+class HeadCache:
+    """Bounded in-memory cache of the leading bytes of recently served files.
+
+    Playback almost always starts with a range request at offset 0, so
+    keeping the first MEDIA_HEAD_SEGMENT_BYTES of hot files in memory
+    serves the start of a video (and small files such as avatars entirely)
+    without touching the disk. Entries are keyed by path and checked against
+    the file's size, mtime and inode, so a replaced file is never served
+    stale; least recently used entries are evicted past the byte budget.
+    """
+
+    def __init__(self, max_bytes: int, segment_bytes: int):
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _version(stat_result: os.stat_result) -> tuple:
+        return (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+
+    async def get(self, path: Path, stat_result: os.stat_result) -> bytes:
+        key = str(path)
+        entry = self._entries.get(key)
+        if entry is not None:
+            version, head = entry
+            if version == self._version(stat_result):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return head
+            self.invalidate(path)
+        
+        self.misses += 1
+        async with aiofiles.open(path, "rb") as file:
+            head = await file.read(min(self.segment_bytes, stat_result.st_size))
+        if len(head) <= self.max_bytes:
+            # A concurrent miss for the same file may have stored it meanwhile
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._entries[key] = (self._version(stat_result), head)
+            self._size += len(head)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+        return head
+
+    def invalidate(self, path: Path):
+        entry = self._entries.pop(str(path.resolve()), None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "segment_bytes": self.segment_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+head_cache = HeadCache(MEDIA_HEAD_CACHE_BYTES, MEDIA_HEAD_SEGMENT_BYTES)
+
+class RangeFileResponse(Response):
+    """206 response for one or more byte ranges of a file.
+
+    A single range is sent as-is; several ranges are sent as
+    multipart/byteranges. Bytes covered by `head` (the cached start of the
+    file) are sent from memory; the rest is read with large async reads so
+    seeking clients don't tie up the event loop.
+    """
+
+    def __init__(self, path: Path, ranges: List[tuple], file_size: int, content_type: str, headers: dict,
+                 head: bytes = b""):
+        self.path = path
+        self.head = head
+        self.status_code = 206
+        self.background = None
+        headers = dict(headers)
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.parts = [(b"", start, end)]
+            self.closing = b""
+            headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            self.media_type = content_type
+        else:
+            boundary = uuid.uuid4().hex
+            self.parts = [
+                (
+                    (f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n").encode(),
+                    start,
+                    end,
+                )
+                for start, end in ranges
+            ]
+            self.closing = f"\r\n--{boundary}--\r\n".encode()
+            self.media_type = f"multipart/byteranges; boundary={boundary}"
+        length = sum(len(prefix) + end - start + 1 for prefix, start, end in self.parts) + len(self.closing)
+        headers["Content-Length"] = str(length)
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with aiofiles.open(self.path, "rb") as file:
+            for prefix, start, end in self.parts:
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                if start < len(self.head):
+                    cached = self.head[start:end + 1]
+                    await send({"type": "http.response.body", "body": cached, "more_body": True})
+                    start += len(cached)
+                await file.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await file.read(min(MEDIA_READ_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": self.closing, "more_body": False})
+
 # Custom route to serve videos with proper content-type and range support
+VERSIONED_AVATAR_PATH = re.compile(r"^avatars/[^/]+/[0-9a-f]{16}-\w+\.webp$")
+
+async def read_head(path: Path, stat_result: os.stat_result) -> bytes:
+    # The file may be deleted (e.g. an old avatar variant) after the stat
+    try:
+        return await head_cache.get(path, stat_result)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
 @app.get("/uploads/{file_path:path}")
 @app.head("/uploads/{file_path:path}")
 async def serve_upload(file_path: str, request: Request):
-    file_full_path = UPLOADS_DIR / file_path
-    if not file_full_path.exists() or not file_full_path.is_file():
+    file_full_path = (UPLOADS_DIR / file_path).resolve()
+    # Refuse paths outside the uploads directory and in-progress temp files
+    if UPLOADS_DIR.resolve() not in file_full_path.parents or file_full_path.name.startswith("."):
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        stat_result = await aiofiles.os.stat(file_full_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="File not found")
     
     # Guess the content type
@@ -91,59 +429,61 @@ async def serve_upload(file_path: str, request: Request):
     if content_type is None:
         content_type = "application/octet-stream"
     
-    # Get file size
-    file_size = file_full_path.stat().st_size
+    file_size = stat_result.st_size
     
-    # Common headers for both range and full requests
+    # Content-addressed blobs and versioned avatar variants never change:
+    # their name is a strong ETag and they can be cached for good
+    if file_path.startswith("objects/") or VERSIONED_AVATAR_PATH.match(file_path):
+        etag = f'"{file_full_path.stem}"'
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        etag = file_etag(stat_result)
+        cache_control = "public, max-age=3600"
+    
+    # Common headers for all responses
     common_headers = {
         "Accept-Ranges": "bytes",
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
-        "Access-Control-Allow-Headers": "Range",
-        "Cache-Control": "public, max-age=3600",
+        "Access-Control-Allow-Headers": "Range, If-Range, If-None-Match, If-Modified-Since",
+        "Access-Control-Expose-Headers": "Accept-Ranges, Content-Range, Content-Length, ETag",
+        "Cache-Control": cache_control,
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
     }
     
+    if is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=common_headers)
+    
     # Check for range request
     range_header = request.headers.get("range")
     
-    if range_header:
-        # Parse range header
-        range_match = range_header.replace("bytes=", "").split("-")
-        start = int(range_match[0]) if range_match[0] else 0
-        end = int(range_match[1]) if len(range_match) > 1 and range_match[1] else file_size - 1
-        
-        # Read the requested chunk
-        chunk_size = end - start + 1
-        
-        def iterfile():
-            with open(file_full_path, "rb") as f:
-                f.seek(start)
-                remaining = chunk_size
-                while remaining > 0:
-                    chunk = f.read(min(8192, remaining))
-                    if not chunk:
-                        break
-                    remaining -= len(chunk)
-                    yield chunk
-        
-        headers = {
-            **common_headers,
-            "Content-Range": f"bytes {start}-{end}/{file_size}",
-            "Content-Length": str(chunk_size),
-        }
-        
-        return StreamingResponse(
-            iterfile(),
-            media_type=content_type,
-            headers=headers,
-            status_code=206
-        )
+    if range_header and if_range_matches(request, etag, stat_result.st_mtime):
+        ranges = parse_range_header(range_header, file_size)
+        if ranges == []:
+            return Response(
+                status_code=416,
+                headers={**common_headers, "Content-Range": f"bytes */{file_size}"}
+            )
+        if ranges:
+            head = b""
+            if ranges[0][0] < head_cache.segment_bytes:
+                head = await read_head(file_full_path, stat_result)
+            return RangeFileResponse(file_full_path, ranges, file_size, content_type, common_headers, head)
+    
+    # Small files (avatars) fit in the head cache entirely
+    if file_size <= head_cache.segment_bytes and request.method == "GET":
+        head = await read_head(file_full_path, stat_result)
+        if len(head) == file_size:
+            return Response(content=head, media_type=content_type, headers=common_headers)
     
-    # Return full file for non-range requests
+    # Return full file for non-range requests; servers supporting the ASGI
+    # pathsend extension send it without copying through Python
     return FileResponse(
         path=str(file_full_path),
         media_type=content_type,
-        headers=common_headers
+        headers=common_headers,
+        stat_result=stat_result
     )
 
 # Models
@@ -164,6 +504,7 @@ class User(BaseModel):
     display_name: str
     skill_category: str = DEFAULT_SKILL_CATEGORIES[0]
     avatar_url: Optional[str] = None
+    avatar_urls: Optional[Dict[str, str]] = None
     created_at: str
     posts_count: int = 0
     validations_received: int = 0
@@ -178,6 +519,11 @@ class Post(BaseModel):
     skill_category: str
     created_at: str
     validation_count: int = 0
+    status: str = POST_STATUS_READY
+    video_duration: Optional[float] = None
+    video_width: Optional[int] = None
+    video_height: Optional[int] = None
+    video_bitrate: Optional[int] = None
     user: Optional[User] = None
     is_validated_by_me: bool = False
 
@@ -190,6 +536,37 @@ class LeaderboardUser(BaseModel):
     validations_received: int
     posts_count: int
 
+class LeaderboardRank(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    rank: int
+    total: int
+    skill_category: Optional[str] = None
+    user: LeaderboardUser
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+
+class DirectUploadPart(BaseModel):
+    part_number: int
+    etag: str
+
+class DirectUploadComplete(BaseModel):
+    title: str
+    description: str
+    skill_category: str
+    parts: List[DirectUploadPart] = []
+
+class UploadSession(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    filename: str
+    content_type: str
+    size: int
+    offset: int
+    expires_at: str
+
 class Validation(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str
@@ -198,6 +575,64 @@ class Validation(BaseModel):
     created_at: str
 
 # Helper functions
+class PasswordHasher:
+    """Runs bcrypt on a dedicated thread pool instead of the event loop.
+
+    At most `workers` hashes run at once and at most `max_waiting` more may
+    queue behind them; further requests get a 503 rather than piling up.
+    Records how long calls wait for a worker.
+    """
+
+    def __init__(self, workers: int, max_waiting: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(workers + max_waiting)
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self.calls = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def _run(self, fn, *args):
+        if self._slots.locked():
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        async with self._slots:
+            submitted = time.perf_counter()
+            
+            def timed():
+                return time.perf_counter() - submitted, fn(*args)
+            
+            waited, result = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+            self.calls += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(pwd_context.verify, password, password_hash)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return pwd_context.needs_update(password_hash)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": BCRYPT_ROUNDS,
+            "workers": self.workers,
+            "max_waiting": self.max_waiting,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_wait_ms": round(self.total_wait_seconds / self.calls * 1000, 3) if self.calls else None,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_WAITING)
+
 def create_access_token(user_id: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
     to_encode = {"sub": user_id, "exp": expire}
@@ -218,6 +653,1326 @@ def verify_token(token: str) -> str:
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     return verify_token(credentials.credentials)
 
+def list_avatar_url(user: dict) -> Optional[str]:
+    """Avatar URL to embed in lists: the small variant when one exists."""
+    return (user.get("avatar_urls") or {}).get(AVATAR_LIST_VARIANT) or user.get("avatar_url")
+
+# Posts embed a snapshot of these author fields as "author", so reading a
+# post never touches the users collection. AuthorFanout rewrites the
+# snapshots when a profile changes.
+AUTHOR_SNAPSHOT_FIELDS = ("id", "email", "display_name", "skill_category", "avatar_url", "avatar_urls", "created_at")
+AUTHOR_SNAPSHOT_PROJECTION = {"_id": 0, **{field: 1 for field in AUTHOR_SNAPSHOT_FIELDS}}
+
+def author_snapshot(user: dict) -> dict:
+    """Author fields to embed in posts, with a rev that changes whenever they do."""
+    snapshot = {field: user.get(field) for field in AUTHOR_SNAPSHOT_FIELDS}
+    snapshot["avatar_url"] = list_avatar_url(user)
+    snapshot["skill_category"] = snapshot["skill_category"] or DEFAULT_SKILL_CATEGORIES[0]
+    snapshot["rev"] = hashlib.sha1(json.dumps(snapshot, sort_keys=True).encode()).hexdigest()[:16]
+    return snapshot
+
+async def save_upload(upload: UploadFile, destination: Path, max_bytes: int,
+                      inspector: Optional[VideoInspector] = None, hasher=None) -> int:
+    """Stream an uploaded file to disk without blocking the event loop.
+
+    The body is copied in UPLOAD_CHUNK_SIZE chunks into a temporary file next
+    to destination and renamed over it once complete, so readers never see a
+    partial file. Aborts with 413 as soon as max_bytes is exceeded, and with
+    400 as soon as the optional inspector rejects the content. An optional
+    hashlib object is updated with the content as it streams. Returns the
+    number of bytes written.
+
+    For multipart form uploads Starlette has already spooled the whole body
+    to its own temporary file before the handler runs, so these checks only
+    stop the copy made here; only the resumable PUT /uploads/{id} path
+    rejects a bad video before the rest of it is received.
+    """
+    temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+    written = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as buffer:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the {max_bytes} byte size limit"
+                    )
+                if inspector:
+                    inspector.feed(chunk)
+                if hasher:
+                    # hashlib releases the GIL on large buffers
+                    await asyncio.to_thread(hasher.update, chunk)
+                await buffer.write(chunk)
+        if inspector:
+            inspector.finish()
+        await aiofiles.os.replace(temp_path, destination)
+    except BaseException as e:
+        try:
+            await aiofiles.os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        if isinstance(e, MediaError):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+    return written
+
+async def optimize_video(path: Path):
+    """Post-process a stored video so browsers can start playback from one request.
+
+    MP4/QuickTime files get their moov box moved ahead of the media data.
+    Runs in a worker thread; files that can't be rewritten are kept as-is.
+    """
+    if path.suffix.lower() not in (".mp4", ".m4v", ".mov"):
+        return
+    try:
+        if await asyncio.to_thread(faststart, path):
+            logging.info(f"Relocated moov box of {path.name}")
+    except (MediaError, OSError) as e:
+        logging.warning(f"Skipping faststart for {path.name}: {e}")
+
+class BlobStore:
+    """Content-addressed store for locally hosted videos.
+
+    Files live under UPLOADS_DIR/objects/<aa>/<sha256>.<ext> and are
+    described by a `blobs` document holding a reference count. Storing the
+    same bytes twice (e.g. a client retrying an upload) takes another
+    reference instead of another copy. Blobs whose count drops to zero are
+    deleted by collect() once BLOB_GC_GRACE_SECONDS have passed. Claims and
+    collection are serialized so a blob can't be collected while it is
+    being re-used.
+    """
+
+    def __init__(self, grace_seconds: float, interval_seconds: float):
+        self.grace_seconds = grace_seconds
+        self.interval_seconds = interval_seconds
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @staticmethod
+    def relative_path(digest: str, extension: str) -> str:
+        return f"objects/{digest[:2]}/{digest}.{extension}"
+
+    async def store(self, staged_path: Path, digest: str, extension: str) -> str:
+        """Take a reference to the blob for digest, moving staged_path in if new.
+
+        Returns the blob's path relative to UPLOADS_DIR. The staged file is
+        consumed either way.
+        """
+        async with self._lock:
+            existing = await db.blobs.find_one_and_update(
+                {"digest": digest},
+                {
+                    "$inc": {"refcount": 1},
+                    "$unset": {"released_at": ""},
+                    "$setOnInsert": {
+                        "filename": self.relative_path(digest, extension),
+                        "size": staged_path.stat().st_size,
+                        "created_at": datetime.now(timezone.utc).isoformat()
+                    }
+                },
+                upsert=True,
+                projection={"_id": 0, "filename": 1},
+                return_document=ReturnDocument.BEFORE
+            )
+            filename = existing["filename"] if existing else self.relative_path(digest, extension)
+            target = UPLOADS_DIR / filename
+            if existing and await aiofiles.os.path.exists(target):
+                await aiofiles.os.remove(staged_path)
+            else:
+                await aiofiles.os.makedirs(target.parent, exist_ok=True)
+                await aiofiles.os.replace(staged_path, target)
+            return filename
+
+    async def release(self, digest: str):
+        await db.blobs.update_one(
+            {"digest": digest},
+            {"$inc": {"refcount": -1}, "$set": {"released_at": datetime.now(timezone.utc).isoformat()}}
+        )
+
+    async def collect(self) -> int:
+        """Delete unreferenced blobs past their grace period; returns how many."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.grace_seconds)).isoformat()
+        collected = 0
+        async with self._lock:
+            async for blob in db.blobs.find(
+                {"refcount": {"$lte": 0}, "released_at": {"$lt": cutoff}}, {"_id": 0}
+            ):
+                result = await db.blobs.delete_one({"digest": blob["digest"], "refcount": {"$lte": 0}})
+                if result.deleted_count:
+                    try:
+                        await aiofiles.os.remove(UPLOADS_DIR / blob["filename"])
+                    except FileNotFoundError:
+                        pass
+                    collected += 1
+        return collected
+
+    async def _run(self):
+        while True:
+            try:
+                collected = await self.collect()
+                if collected:
+                    logging.info(f"Garbage-collected {collected} unreferenced video blobs")
+            except Exception as e:
+                logging.error(f"Blob garbage collection failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+blob_store = BlobStore(BLOB_GC_GRACE_SECONDS, BLOB_GC_INTERVAL_SECONDS)
+
+class UploadSessionStore:
+    """Resumable video uploads, stored as partial files under PARTIAL_UPLOADS_DIR.
+
+    Each session is an `upload_sessions` document recording the declared
+    size and the number of bytes safely received so far. Chunks for one
+    session are written one at a time; a chunk that was cut off part-way
+    still advances the offset by the bytes that made it to disk, so the
+    client resumes from there. Sessions untouched for
+    UPLOAD_SESSION_TTL_SECONDS are removed by expire() along with their file.
+
+    Direct sessions (`direct: True`) track an upload the client sends
+    straight to the storage backend instead; they have no partial file and
+    discarding one aborts the upload in the bucket.
+    """
+
+    def __init__(self, ttl_seconds: float, interval_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self._locks = {}
+        self._task = None
+
+    @staticmethod
+    def partial_path(session_id: str) -> Path:
+        return PARTIAL_UPLOADS_DIR / f"{session_id}.part"
+
+    def _expires_at(self) -> str:
+        return (datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)).isoformat()
+
+    @asynccontextmanager
+    async def lock(self, session_id: str, user_id: Optional[str] = None):
+        """Hold the session's lock; given user_id, 404 first unless the session is theirs.
+
+        Lock entries are reference counted and dropped once nothing holds or
+        waits on them, so requests for unknown ids leave nothing behind.
+        """
+        if user_id is not None:
+            await self.get(session_id, user_id)
+        entry = self._locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[session_id]
+
+    async def create(self, user_id: str, filename: str, content_type: str, size: int) -> dict:
+        session = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "offset": 0,
+            "finalizing": False,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "expires_at": self._expires_at()
+        }
+        async with aiofiles.open(self.partial_path(session["id"]), "wb"):
+            pass
+        await db.upload_sessions.insert_one(session)
+        session.pop("_id", None)
+        return session
+
+    async def create_direct(self, user_id: str, filename: str, content_type: str, size: int,
+                            post_id: str, key: str, upload_id: Optional[str]) -> dict:
+        session = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "offset": 0,
+            "finalizing": False,
+            "direct": True,
+            "post_id": post_id,
+            "key": key,
+            "upload_id": upload_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "expires_at": self._expires_at()
+        }
+        await db.upload_sessions.insert_one(session)
+        session.pop("_id", None)
+        return session
+
+    async def get(self, session_id: str, user_id: str) -> dict:
+        session = await db.upload_sessions.find_one({"id": session_id, "user_id": user_id}, {"_id": 0})
+        if not session:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return session
+
+    async def append(self, session: dict, offset: int, body) -> int:
+        """Write an async iterable of bytes at offset; returns the new offset.
+
+        Anything past the recorded offset (left by an interrupted chunk that
+        was never acknowledged) is truncated before writing.
+        """
+        if offset != session["offset"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload offset mismatch, expected {session['offset']}",
+                headers={UPLOAD_OFFSET_HEADER: str(session["offset"])}
+            )
+        written = 0
+        inspector = VideoInspector(session["size"], MAX_VIDEO_DURATION_SECONDS) if offset == 0 else None
+        try:
+            async with aiofiles.open(self.partial_path(session["id"]), "r+b") as buffer:
+                await buffer.seek(offset)
+                await buffer.truncate()
+                async for chunk in body:
+                    if not chunk:
+                        continue
+                    if offset + written + len(chunk) > session["size"]:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Chunk exceeds the declared upload size of {session['size']} bytes"
+                        )
+                    if inspector:
+                        # Reject obviously bad files before the rest is sent
+                        inspector.feed(chunk)
+                    await buffer.write(chunk)
+                    written += len(chunk)
+        except MediaError as e:
+            written = 0
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            if written:
+                await db.upload_sessions.update_one(
+                    {"id": session["id"]},
+                    {"$set": {"offset": offset + written, "expires_at": self._expires_at()}}
+                )
+        return offset + written
+
+    async def claim(self, session_id: str, user_id: str) -> dict:
+        """Mark a completely received session as finalizing, exactly once."""
+        session = await db.upload_sessions.find_one_and_update(
+            {"id": session_id, "user_id": user_id, "finalizing": False},
+            # A fresh expiry keeps expire() off the file while it is published
+            {"$set": {"finalizing": True, "expires_at": self._expires_at()}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not session:
+            await self.get(session_id, user_id)
+            raise HTTPException(status_code=409, detail="Upload is already being finalized")
+        if not session.get("direct") and session["offset"] != session["size"]:
+            await self.release(session_id)
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload is incomplete, {session['offset']} of {session['size']} bytes received",
+                headers={UPLOAD_OFFSET_HEADER: str(session["offset"])}
+            )
+        return session
+
+    async def release(self, session_id: str):
+        """Let a claimed session be finalized again after a transient failure."""
+        await db.upload_sessions.update_one({"id": session_id}, {"$set": {"finalizing": False}})
+
+    async def discard(self, session_id: str, keep_file: bool = False, query: Optional[dict] = None) -> bool:
+        """Delete a session and, unless keep_file, the bytes uploaded so far."""
+        session = await db.upload_sessions.find_one_and_delete({"id": session_id, **(query or {})})
+        if not session or keep_file:
+            return bool(session)
+        if session.get("direct"):
+            try:
+                await storage_backend.abort_direct_upload(session["key"], session.get("upload_id"))
+            except Exception as e:
+                logging.warning(f"Could not abort direct upload {session_id}: {e}")
+        else:
+            try:
+                await aiofiles.os.remove(self.partial_path(session_id))
+            except FileNotFoundError:
+                pass
+        return True
+
+    async def expire(self) -> int:
+        """Remove sessions past their expiry together with their partial files."""
+        now = datetime.now(timezone.utc).isoformat()
+        expired = 0
+        async for session in db.upload_sessions.find({"expires_at": {"$lt": now}}, {"_id": 0, "id": 1}):
+            if session["id"] in self._locks:
+                continue
+            async with self.lock(session["id"]):
+                if await self.discard(session["id"], query={"expires_at": {"$lt": now}}):
+                    expired += 1
+        return expired
+
+    async def _run(self):
+        while True:
+            try:
+                expired = await self.expire()
+                if expired:
+                    logging.info(f"Expired {expired} abandoned upload sessions")
+            except Exception as e:
+                logging.error(f"Upload session cleanup failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+upload_sessions = UploadSessionStore(UPLOAD_SESSION_TTL_SECONDS, UPLOAD_SESSION_SWEEP_INTERVAL_SECONDS)
+
+async def inspect_video_file(path: Path):
+    """Validate a video already on disk; returns (metadata, sha256 hex digest)."""
+    inspector = VideoInspector(MAX_VIDEO_BYTES, MAX_VIDEO_DURATION_SECONDS)
+    hasher = hashlib.sha256()
+    async with aiofiles.open(path, "rb") as source:
+        while True:
+            chunk = await source.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            inspector.feed(chunk)
+            await asyncio.to_thread(hasher.update, chunk)
+    inspector.finish()
+    return inspector.result, hasher.hexdigest()
+
+async def bulk_increment(increments: dict) -> dict:
+    """Apply counter increments with one unordered bulk write per collection.
+
+    increments maps collection name -> {document id -> {field: delta}}. The
+    per-collection writes run concurrently, so the whole batch costs a single
+    round-trip of latency. Returns the increments that were not applied, in
+    the same shape, so a retry never applies a delta twice.
+    """
+    batches, writes = [], []
+    for collection, docs in increments.items():
+        doc_ids = [doc_id for doc_id, fields in docs.items() if fields]
+        if doc_ids:
+            ops = [UpdateOne({"id": doc_id}, {"$inc": docs[doc_id]}) for doc_id in doc_ids]
+            batches.append((collection, doc_ids))
+            writes.append(db[collection].bulk_write(ops, ordered=False))
+    results = await asyncio.gather(*writes, return_exceptions=True)
+    
+    failed = {}
+    for (collection, doc_ids), result in zip(batches, results):
+        if isinstance(result, BulkWriteError):
+            # An unordered bulk write applies every op but the ones reported
+            failed_ids = [doc_ids[error["index"]] for error in result.details.get("writeErrors", [])]
+        elif isinstance(result, Exception):
+            failed_ids = doc_ids
+        else:
+            continue
+        if failed_ids:
+            logging.error(f"Counter increments on {collection} failed: {result}")
+            failed[collection] = {doc_id: increments[collection][doc_id] for doc_id in failed_ids}
+    return failed
+
+class ResponseVersions:
+    """Version watermarks for cacheable JSON responses.
+
+    Every write that can change a response bumps the matching scope:
+    "posts" for the feed, "leaderboard", and "user:<id>" for a profile.
+    ETags are derived from the scope's version and whatever else the
+    response depends on (viewer, paging), so an If-None-Match request can
+    be answered with 304 before Mongo is queried. The process epoch keeps
+    tags issued before a restart from matching.
+    """
+
+    def __init__(self):
+        self._epoch = uuid.uuid4().hex
+        self._versions = {}
+
+    def bump(self, *scopes: str):
+        for scope in scopes:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def version(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    def etag(self, scope: str, *vary) -> str:
+        key = ":".join([self._epoch, scope, str(self._versions.get(scope, 0)), *map(str, vary)])
+        return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+response_versions = ResponseVersions()
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         cache_control: str = "private, no-cache") -> Optional[Response]:
+    """Return a 304 if the client already has etag, else tag the response."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+class ProfileCache:
+    """LRU + TTL cache of public user documents, keyed by user id.
+
+    Shared by every path that attaches author profiles to posts and by the
+    profile endpoint. Entries hold the user document as stored in Mongo;
+    callers merge pending counter deltas on top. Any write to a user
+    document must call invalidate().
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, user_id: str) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def _store(self, user: dict):
+        self._entries[user["id"]] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user["id"])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_many(self, user_ids) -> dict:
+        """Return {user_id: user document copy} for the ids that exist."""
+        found, missing = {}, []
+        for user_id in set(user_ids):
+            user = self._lookup(user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = dict(user)
+        self.hits += len(found)
+        self.misses += len(missing)
+        
+        if missing:
+            generation = self._generation
+            users = await db.users.find(
+                {"id": {"$in": missing}},
+                {"_id": 0, "password_hash": 0}
+            ).to_list(None)
+            for user in users:
+                # Don't cache a read that may predate a concurrent invalidation
+                if generation == self._generation:
+                    self._store(user)
+                found[user["id"]] = dict(user)
+        return found
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        return (await self.get_many([user_id])).get(user_id)
+
+    def invalidate(self, user_id: str):
+        self._generation += 1
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+profile_cache = ProfileCache(PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS)
+
+class CounterBuffer:
+    """Write-behind buffer for denormalized counters.
+
+    Increments are coalesced per document in memory and written with one
+    bulk_write per collection, either every flush_interval seconds or as soon
+    as max_pending documents have pending deltas. Readers call apply() to
+    merge deltas that have not reached Mongo yet, so responses stay exact.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._inflight = {}
+        self._pending_docs = 0
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._flush_task = None
+
+    def add(self, collection: str, doc_id: str, field: str, delta: int = 1):
+        docs = self._pending.setdefault(collection, {})
+        if doc_id not in docs:
+            docs[doc_id] = {}
+            self._pending_docs += 1
+        docs[doc_id][field] = docs[doc_id].get(field, 0) + delta
+        if self._pending_docs >= self.max_pending and not self._flush_lock.locked():
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self.flush())
+
+    def pending(self, collection: str, doc_id: str) -> dict:
+        """Deltas for one document that are not yet visible in Mongo."""
+        deltas = {}
+        for source in (self._inflight, self._pending):
+            for field, delta in source.get(collection, {}).get(doc_id, {}).items():
+                deltas[field] = deltas.get(field, 0) + delta
+        return deltas
+
+    def apply(self, collection: str, doc: dict) -> dict:
+        """Merge pending deltas into a document read from Mongo, in place."""
+        for field, delta in self.pending(collection, doc["id"]).items():
+            doc[field] = doc.get(field, 0) + delta
+        return doc
+
+    def _requeue(self, increments: dict):
+        for collection, docs in increments.items():
+            for doc_id, fields in docs.items():
+                for field, delta in fields.items():
+                    self.add(collection, doc_id, field, delta)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._inflight, self._pending = self._pending, {}
+            self._pending_docs = 0
+            try:
+                failed = await bulk_increment(self._inflight)
+                # Cached profiles predate these increments
+                for user_id in self._inflight.get("users", {}):
+                    profile_cache.invalidate(user_id)
+                # Keep only the deltas that were not applied, so the next
+                # flush retries them without counting the rest twice
+                self._requeue(failed)
+            except asyncio.CancelledError:
+                # Whether the writes landed is unknown; keep them for the final flush
+                self._requeue(self._inflight)
+                raise
+            finally:
+                self._inflight = {}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Cancel the loop between flushes, never part-way through one
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+counter_buffer = CounterBuffer(COUNTER_FLUSH_INTERVAL_SECONDS, COUNTER_FLUSH_MAX_PENDING)
+
+class Leaderboard:
+    """In-memory leaderboard ordered by validations_received.
+
+    Keeps one sorted list of (-validations_received, user_id) keys for the
+    whole user base and one per skill category, so top-N reads are a slice
+    and a user's rank is a binary search. Rebuilt from Mongo at startup and
+    kept current by the endpoints that change leaderboard fields.
+    """
+
+    FIELDS = ("id", "display_name", "skill_category", "avatar_url", "validations_received", "posts_count")
+
+    def __init__(self):
+        self._users = {}
+        self._global = []
+        self._by_category = {}
+
+    @staticmethod
+    def _key(entry: dict) -> tuple:
+        return (-entry["validations_received"], entry["id"])
+
+    def _unlink(self, entry: dict):
+        key = self._key(entry)
+        for ranking in (self._global, self._by_category.get(entry["skill_category"], [])):
+            index = bisect.bisect_left(ranking, key)
+            if index < len(ranking) and ranking[index] == key:
+                del ranking[index]
+
+    def _link(self, entry: dict):
+        key = self._key(entry)
+        bisect.insort(self._global, key)
+        bisect.insort(self._by_category.setdefault(entry["skill_category"], []), key)
+
+    def upsert(self, user: dict):
+        entry = {field: user.get(field) for field in self.FIELDS}
+        entry["avatar_url"] = list_avatar_url(user)
+        entry["skill_category"] = entry["skill_category"] or DEFAULT_SKILL_CATEGORIES[0]
+        entry["validations_received"] = entry["validations_received"] or 0
+        entry["posts_count"] = entry["posts_count"] or 0
+        previous = self._users.get(entry["id"])
+        if previous:
+            self._unlink(previous)
+        self._users[entry["id"]] = entry
+        self._link(entry)
+
+    def update(self, user_id: str, **fields):
+        entry = self._users.get(user_id)
+        if entry:
+            self.upsert({**entry, **fields})
+
+    def increment(self, user_id: str, field: str, delta: int = 1):
+        entry = self._users.get(user_id)
+        if entry:
+            self.update(user_id, **{field: entry[field] + delta})
+
+    def counters(self, user_id: str) -> dict:
+        """A user's current posts_count and validations_received, pending increments included."""
+        entry = self._users.get(user_id) or {}
+        return {"posts_count": entry.get("posts_count", 0), "validations_received": entry.get("validations_received", 0)}
+
+    def top(self, limit: int, skill_category: Optional[str] = None) -> List[dict]:
+        ranking = self._global if skill_category is None else self._by_category.get(skill_category, [])
+        return [dict(self._users[user_id]) for _, user_id in ranking[:limit]]
+
+    def rank(self, user_id: str, skill_category: Optional[str] = None) -> Optional[dict]:
+        """1-based competition rank of a user; users with equal scores share a rank."""
+        entry = self._users.get(user_id)
+        if not entry:
+            return None
+        ranking = self._global if skill_category is None else self._by_category.get(skill_category, [])
+        if skill_category is not None and entry["skill_category"] != skill_category:
+            return None
+        return {
+            "rank": bisect.bisect_left(ranking, (-entry["validations_received"],)) + 1,
+            "total": len(ranking),
+            "skill_category": skill_category,
+            "user": dict(entry),
+        }
+
+    async def rebuild(self):
+        self._users, self._global, self._by_category = {}, [], {}
+        projection = {"_id": 0, "avatar_urls": 1, **{field: 1 for field in self.FIELDS}}
+        async for user in db.users.find({}, projection):
+            self.upsert(counter_buffer.apply("users", user))
+
+leaderboard = Leaderboard()
+
+class UploadQueue:
+    """Bounded queue of videos waiting to be pushed to cloud storage.
+
+    create_post spools the video to SPOOL_DIR, inserts the post as
+    processing and enqueues it. A pool of workers uploads each file and marks
+    the post ready, retrying with exponential backoff before giving up and
+    marking it failed.
+    """
+
+    def __init__(self, storage, workers: int, max_size: int, max_attempts: int, retry_base_seconds: float):
+        self.storage = storage
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._queue = asyncio.Queue(maxsize=max_size)
+        self._tasks = []
+        self._resume_task = None
+
+    def submit(self, post_id: str, path: Path) -> bool:
+        """Enqueue a spooled upload; returns False when the queue is full."""
+        try:
+            self._queue.put_nowait((post_id, path))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _process(self, post_id: str, path: Path):
+        await optimize_video(path)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                video_url = await self.storage.upload(path, f"{post_id}{path.suffix}")
+                break
+            except Exception as e:
+                logging.warning(f"Upload of post {post_id} failed (attempt {attempt}/{self.max_attempts}): {e}")
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.retry_base_seconds * 2 ** (attempt - 1))
+        else:
+            await db.posts.update_one(
+                {"id": post_id},
+                {"$set": {"status": POST_STATUS_FAILED}}
+            )
+            logging.error(f"Giving up on upload of post {post_id}")
+            await aiofiles.os.remove(path)
+            return
+        
+        post = await db.posts.find_one_and_update(
+            {"id": post_id},
+            {"$set": {"status": POST_STATUS_READY, "video_url": video_url}},
+            projection={"_id": 0, "user_id": 1}
+        )
+        await aiofiles.os.remove(path)
+        if post:
+            counter_buffer.add("users", post["user_id"], "posts_count")
+            leaderboard.increment(post["user_id"], "posts_count")
+            response_versions.bump("posts", "leaderboard", f"user:{post['user_id']}")
+        else:
+            # The post went away while uploading; don't leave its video behind
+            try:
+                await self.storage.delete(f"{post_id}{path.suffix}")
+            except Exception as e:
+                logging.warning(f"Could not delete video of removed post {post_id}: {e}")
+
+    async def _worker(self):
+        while True:
+            post_id, path = await self._queue.get()
+            try:
+                await self._process(post_id, path)
+            except Exception as e:
+                logging.error(f"Upload worker error for post {post_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _resume(self):
+        # Re-enqueue uploads interrupted by a restart. There can be more of
+        # them than the queue holds, so wait for the workers to make room.
+        posts = await db.posts.find(
+            {"status": POST_STATUS_PROCESSING}, {"_id": 0, "id": 1, "video_filename": 1}
+        ).to_list(None)
+        for post in posts:
+            path = SPOOL_DIR / post["video_filename"]
+            if path.exists():
+                await self._queue.put((post["id"], path))
+            else:
+                await db.posts.update_one({"id": post["id"]}, {"$set": {"status": POST_STATUS_FAILED}})
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._resume_task = asyncio.create_task(self._resume())
+
+    async def stop(self):
+        # Unfinished jobs keep their spool file and resume on next startup
+        tasks = self._tasks + ([self._resume_task] if self._resume_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._resume_task = None
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "max_size": self._queue.maxsize, "workers": len(self._tasks)}
+
+def build_storage_backend():
+    """Pick the backend published videos go to; None keeps them in the local blob store."""
+    if USE_FAKE_UPLOADER:
+        return LocalStorage(UPLOADS_DIR / "fake-cloud", "/uploads/fake-cloud", FAKE_UPLOAD_DELAY_SECONDS)
+    if STORAGE_BACKEND == "s3":
+        s3_client = boto3.client(
+            "s3",
+            region_name=S3_REGION,
+            endpoint_url=S3_ENDPOINT_URL,
+            aws_access_key_id=os.environ.get('S3_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.environ.get('S3_SECRET_ACCESS_KEY')
+        )
+        return S3Storage(
+            s3_client, S3_BUCKET, S3_KEY_PREFIX, S3_PUBLIC_BASE_URL,
+            S3_MULTIPART_PART_BYTES, S3_MULTIPART_CONCURRENCY, S3_PRESIGN_EXPIRES_SECONDS
+        )
+    if STORAGE_BACKEND == "cloudinary":
+        return CloudinaryStorage()
+    return None
+
+storage_backend = build_storage_backend()
+
+if storage_backend:
+    upload_queue = UploadQueue(
+        storage_backend, UPLOAD_WORKERS, UPLOAD_QUEUE_MAX_SIZE,
+        UPLOAD_MAX_ATTEMPTS, UPLOAD_RETRY_BASE_SECONDS
+    )
+else:
+    upload_queue = None
+
+# Keyset pagination helpers
+# Posts are ordered by (created_at, id) descending. A cursor is an opaque,
+# url-safe token holding the sort key of the last post on the previous page,
+# so every page is an index seek + limit no matter how deep the client scrolls.
+def encode_cursor(post: dict, score: Optional[float] = None) -> str:
+    key = {"c": post["created_at"], "i": post["id"]}
+    if score is not None:
+        key["s"] = score
+    raw = json.dumps(key, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, ranked: bool = False) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        created_at, last_id = data["c"], data["i"]
+        if not isinstance(created_at, str) or not isinstance(last_id, str):
+            raise ValueError("Malformed cursor")
+        score = float(data["s"]) if ranked else None
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"created_at": created_at, "id": last_id, "score": score}
+
+def parse_id_list(ids: Optional[str], name: str = "ids") -> List[str]:
+    """Split a comma-separated id list, dropping blanks and duplicates but keeping order."""
+    id_list = list(dict.fromkeys(part.strip() for part in (ids or "").split(",") if part.strip()))
+    if not id_list:
+        raise HTTPException(status_code=400, detail=f"{name} must list at least one id")
+    if len(id_list) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"{name} may list at most {MAX_BATCH_IDS} ids")
+    return id_list
+
+def page_limit(limit: int) -> int:
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    return min(limit, MAX_PAGE_LIMIT)
+
+async def fetch_posts_page(query: dict, limit: int, cursor: Optional[str], projection: Optional[dict] = None,
+                           lookups: List[dict] = ()):
+    """Fetch one page of posts matching query, newest first.
+
+    Returns (posts, next_cursor); next_cursor is None on the last page.
+    projection must keep id and created_at, which the cursor is built from.
+    lookups (see hydration_stages) run on the page inside the same query.
+    """
+    if cursor:
+        last = decode_cursor(cursor)
+        seek = {"$or": [
+            {"created_at": {"$lt": last["created_at"]}},
+            {"created_at": last["created_at"], "id": {"$lt": last["id"]}},
+        ]}
+        query = {"$and": [query, seek]} if query else seek
+    
+    # Fetch one extra document to know whether another page exists
+    posts = await db.posts.aggregate([
+        {"$match": query},
+        {"$sort": {"created_at": -1, "id": -1}},
+        {"$limit": limit + 1},
+        {"$project": projection or {"_id": 0}},
+        *lookups,
+    ]).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1])
+    return posts, next_cursor
+
+def search_pipeline(text: str, query: dict, limit: int, cursor: Optional[str],
+                    projection: Optional[dict] = None, lookups: List[dict] = ()) -> List[dict]:
+    """Build the aggregation for one page of search_posts_page (limit + 1 hits)."""
+    projection = projection or {"_id": 0}
+    if any(value == 1 for name, value in projection.items() if name != "_id"):
+        # An inclusion projection must name the score the cursor is built from;
+        # otherwise the field added below is kept anyway
+        projection = {**projection, "search_score": 1}
+    pipeline = [
+        {"$match": {"$text": {"$search": text}, **query}},
+        {"$addFields": {"search_score": {"$meta": "textScore"}}},
+    ]
+    if cursor:
+        last = decode_cursor(cursor, ranked=True)
+        pipeline.append({"$match": {"$or": [
+            {"search_score": {"$lt": last["score"]}},
+            {"search_score": last["score"], "created_at": {"$lt": last["created_at"]}},
+            {"search_score": last["score"], "created_at": last["created_at"], "id": {"$lt": last["id"]}},
+        ]}})
+    pipeline += [
+        {"$sort": {"search_score": -1, "created_at": -1, "id": -1}},
+        {"$limit": limit + 1},
+        {"$project": projection},
+        *lookups,
+    ]
+    return pipeline
+
+async def search_posts_page(text: str, query: dict, limit: int, cursor: Optional[str],
+                            projection: Optional[dict] = None, lookups: List[dict] = ()):
+    """Fetch one page of full-text search hits, best match first.
+
+    Uses the posts text index (title, description, author_display_name), so
+    the work done is proportional to the number of hits rather than the size
+    of the collection. Ties on relevance fall back to newest first, and the
+    cursor carries the score so pages stay stable while scrolling.
+    """
+    pipeline = search_pipeline(text, query, limit, cursor, projection, lookups)
+    posts = await db.posts.aggregate(pipeline).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1], score=posts[-1]["search_score"])
+    for post in posts:
+        post.pop("search_score", None)
+    return posts, next_cursor
+
+async def prune_avatar_variants(user_id: str, keep: set):
+    """Delete a user's avatar files other than those named in keep."""
+    user_avatars_dir = AVATARS_DIR / user_id
+    if not user_avatars_dir.is_dir():
+        return
+    for old_path in await asyncio.to_thread(list, user_avatars_dir.iterdir()):
+        if old_path.name not in keep and not old_path.name.startswith("."):
+            head_cache.invalidate(old_path)
+            try:
+                await aiofiles.os.remove(old_path)
+            except FileNotFoundError:
+                pass
+
+class AuthorFanout:
+    """Rewrites the author snapshots embedded in posts after a profile change.
+
+    Profile edits set author_fanout_pending on the user and call schedule().
+    A background worker then rewrites the user's stale snapshots
+    batch_size posts at a time, bumping the posts response version after
+    each batch, and clears the flag once none are left. Only then are
+    avatar files no longer referenced by the profile deleted, so a post
+    never points at a removed image. Users still flagged at startup are
+    rescheduled.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        self._task = None
+        self.users_rewritten = 0
+        self.posts_rewritten = 0
+
+    def schedule(self, user_id: str):
+        if user_id not in self._queued:
+            self._queued.add(user_id)
+            self._queue.put_nowait(user_id)
+
+    async def rewrite(self, user_id: str) -> Optional[dict]:
+        """Bring the snapshot in every post by user_id up to date; returns the snapshot written."""
+        while True:
+            # Re-read per batch so a profile edit made meanwhile wins
+            user = await db.users.find_one({"id": user_id}, AUTHOR_SNAPSHOT_PROJECTION)
+            if not user:
+                return None
+            snapshot = author_snapshot(user)
+            stale = {"user_id": user_id, "author.rev": {"$ne": snapshot["rev"]}}
+            batch = await db.posts.find(stale, {"_id": 0, "id": 1}).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                break
+            result = await db.posts.update_many(
+                {"id": {"$in": [post["id"] for post in batch]}, "author.rev": {"$ne": snapshot["rev"]}},
+                {"$set": {"author": snapshot, "author_display_name": snapshot["display_name"]}}
+            )
+            self.posts_rewritten += result.modified_count
+            response_versions.bump("posts")
+        
+        await db.users.update_one({"id": user_id}, {"$unset": {"author_fanout_pending": ""}})
+        self.users_rewritten += 1
+        return snapshot
+
+    async def _run(self):
+        while True:
+            user_id = await self._queue.get()
+            # A profile edit during the rewrite schedules the user again
+            self._queued.discard(user_id)
+            try:
+                snapshot = await self.rewrite(user_id)
+                if snapshot:
+                    keep = {Path(url).name for url in (snapshot["avatar_urls"] or {}).values()}
+                    await prune_avatar_variants(user_id, keep)
+            except Exception as e:
+                # The user stays flagged and is retried on the next startup
+                logging.error(f"Author snapshot fan-out failed for user {user_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        async for user in db.users.find({"author_fanout_pending": True}, {"_id": 0, "id": 1}):
+            self.schedule(user["id"])
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "users_rewritten": self.users_rewritten,
+            "posts_rewritten": self.posts_rewritten,
+        }
+
+author_fanout = AuthorFanout(AUTHOR_FANOUT_BATCH_SIZE)
+
+async def backfill_author_snapshots():
+    """Embed author snapshots in posts written before posts carried them."""
+    user_ids = await db.posts.distinct("user_id", {"author": {"$exists": False}})
+    for user_id in user_ids:
+        await author_fanout.rewrite(user_id)
+
+# Post hydration
+# The author comes from the snapshot embedded in each post, with live
+# counters from the leaderboard, and the viewer's validation status is
+# joined inside the posts aggregation with $lookup, so a page of posts is
+# one database round-trip that never reads the users collection. The lookup
+# uses the concise localField/foreignField + pipeline form (MongoDB 5.0+),
+# which is answered from the validations_post_user index.
+def hydration_stages(viewer_id: Optional[str], selection: Optional[tuple] = None) -> List[dict]:
+    """$lookup stages attaching the viewer's validation status."""
+    stages = []
+    if viewer_id and selects(selection, "is_validated_by_me"):
+        stages += [
+            {"$lookup": {
+                "from": "validations",
+                "localField": "id",
+                "foreignField": "post_id",
+                "pipeline": [{"$match": {"user_id": viewer_id}}, {"$limit": 1}, {"$project": {"_id": 1}}],
+                "as": "viewer_validations"
+            }},
+            {"$addFields": {"is_validated_by_me": {"$gt": [{"$size": "$viewer_validations"}, 0]}}},
+            {"$project": {"viewer_validations": 0}},
+        ]
+    return stages
+
+def finish_hydration(posts: List[dict]) -> List[dict]:
+    """Apply pending counters and fill derived fields on aggregated posts, in place."""
+    for post in posts:
+        counter_buffer.apply("posts", post)
+        author = post.pop("author", None)
+        if author:
+            author.pop("rev", None)
+            post["user"] = {**author, **leaderboard.counters(author["id"])}
+        
+        # Add video URL - use stored URL if available (Cloudinary), otherwise construct local URL
+        if not post.get("video_url"):
+            post["video_url"] = f"/uploads/{post['video_filename']}" if post.get("status", POST_STATUS_READY) == POST_STATUS_READY else ""
+        
+        # Ensure skill_category exists in post for backward compatibility
+        if "skill_category" not in post:
+            post["skill_category"] = DEFAULT_SKILL_CATEGORIES[0]
+    
+    return posts
+
+async def overlay_validations(posts: List[dict], viewer_id: str) -> List[dict]:
+    """Return copies of posts with the viewer's is_validated_by_me set."""
+    if not posts:
+        return posts
+    
+    # Batch fetch all validations for current user
+    validations = await db.validations.find(
+        {"post_id": {"$in": [post["id"] for post in posts]}, "user_id": viewer_id},
+        {"_id": 0, "post_id": 1}
+    ).to_list(None)
+    validated_post_ids = {v["post_id"] for v in validations}
+    
+    return [{**post, "is_validated_by_me": post["id"] in validated_post_ids} for post in posts]
+
+class FeedCache:
+    """Cache of hydrated main-feed pages shared by every viewer.
+
+    A page is keyed by (limit, cursor, field selection) and belongs to the
+    current "posts" response version; bumping that version (new post,
+    validation, avatar change) drops every cached page. A miss builds the
+    page with one aggregation that also carries the requesting viewer's
+    validation status. Concurrent misses for the same page share that
+    build, and every other viewer only adds their validation overlay.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._building = {}
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def _build(self, limit: int, cursor: Optional[str], selection: Optional[tuple], viewer_id: str):
+        posts, next_cursor = await fetch_posts_page(
+            dict(VISIBLE_POSTS_FILTER), limit, cursor, posts_projection(selection),
+            hydration_stages(viewer_id, selection=selection)
+        )
+        return finish_hydration(posts), next_cursor
+
+    def _store(self, key: tuple, version: int, task: asyncio.Task):
+        if self._building.get(key) is task:
+            del self._building[key]
+        if task.cancelled() or task.exception() is not None or version != self._version:
+            return
+        self._entries[key] = task.result()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_page(self, limit: int, cursor: Optional[str], selection: Optional[tuple], viewer_id: str):
+        """Return (posts hydrated for viewer_id, next cursor); the posts must not be mutated.
+
+        Pages for a field selection are built from projected reads and
+        cached separately from full pages.
+        """
+        version = response_versions.version("posts")
+        if version != self._version:
+            self._entries.clear()
+            self._building.clear()
+            self._version = version
+        
+        key = (limit, cursor, selection)
+        page = self._entries.get(key)
+        built_for_viewer = False
+        if page is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            task = self._building.get(key)
+            if task is None:
+                self.misses += 1
+                task = asyncio.create_task(self._build(limit, cursor, selection, viewer_id))
+                task.add_done_callback(lambda done: self._store(key, version, done))
+                self._building[key] = task
+                built_for_viewer = True
+            else:
+                self.coalesced += 1
+            # A cancelled request must not cancel the build other requests wait on
+            page = await asyncio.shield(task)
+        
+        posts, next_cursor = page
+        if not built_for_viewer and selects(selection, "is_validated_by_me"):
+            posts = await overlay_validations(posts, viewer_id)
+        return posts, next_cursor
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+        }
+
+feed_cache = FeedCache(FEED_CACHE_MAX_ENTRIES)
+
+# Fast post list serialization
+# The list endpoints keep response_model=List[Post] as their documented
+# contract, but validating and re-encoding every nested model through
+# FastAPI dominates the CPU cost of a large page. Hydrated posts already
+# have the right types, so they are only reshaped to the model's fields
+# (dropping internal ones such as video_filename, filling in defaults) and
+# encoded with orjson.
+def _model_fields(model) -> tuple:
+    return tuple(
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+    )
+
+POST_FIELDS = _model_fields(Post)
+USER_FIELDS = _model_fields(User)
+
+def shape_post(post: dict, selection: Optional[tuple] = None) -> dict:
+    """Reduce a hydrated post to exactly the fields of the Post model, or of a selection."""
+    post_fields, user_fields = (POST_FIELDS, USER_FIELDS) if selection is None else selection
+    shaped = {name: post.get(name, default) for name, default in post_fields}
+    user = shaped.get("user")
+    if user is not None:
+        shaped["user"] = {name: user.get(name, default) for name, default in user_fields}
+    return shaped
+
+def post_list_response(posts: List[dict], response: Response, selection: Optional[tuple] = None) -> ORJSONResponse:
+    """Serialize hydrated posts, keeping headers already set on response."""
+    return ORJSONResponse([shape_post(post, selection) for post in posts], headers=dict(response.headers))
+
+# Sparse field selection
+# List endpoints accept ?fields=title,video_url,user.display_name (Post
+# fields, plus user.<User field> for the author) or ?view=lite for the set a
+# feed card needs. The selection is pushed down into the posts projection,
+# embedded author snapshot included, and only the selected fields are
+# returned.
+LITE_VIEW_FIELDS = (
+    "id,user_id,title,skill_category,created_at,validation_count,status,video_url,video_duration,"
+    "is_validated_by_me,user.id,user.display_name,user.avatar_url"
+)
+
+# Post fields hydration and paging need even when not selected
+POST_HYDRATION_FIELDS = ("id", "user_id", "created_at", "status", "video_url", "video_filename")
+
+def parse_field_selection(fields: Optional[str], view: Optional[str]) -> Optional[tuple]:
+    """Return ((post field, default) pairs, (user field, default) pairs), or None for full posts."""
+    if view not in (None, "full", "lite"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'lite'")
+    if not fields and view == "lite":
+        fields = LITE_VIEW_FIELDS
+    if not fields:
+        return None
+    
+    post_defaults, user_defaults = dict(POST_FIELDS), dict(USER_FIELDS)
+    post_names, user_names = ["id"], []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        if name.startswith("user."):
+            if name[5:] not in user_defaults:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+            user_names.append(name[5:])
+            name = "user"
+        elif name not in post_defaults:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        if name not in post_names:
+            post_names.append(name)
+    if "user" in post_names and not user_names:
+        user_names = list(user_defaults)
+    return (
+        tuple((name, post_defaults[name]) for name in post_names),
+        tuple((name, user_defaults[name]) for name in dict.fromkeys(user_names))
+    )
+
+def selects(selection: Optional[tuple], name: str) -> bool:
+    return selection is None or any(field == name for field, _ in selection[0])
+
+def posts_projection(selection: Optional[tuple], include_author: bool = True) -> dict:
+    if selection is None:
+        return {"_id": 0} if include_author else {"_id": 0, "author": 0}
+    names = {name for name, _ in selection[0]} - {"user", "is_validated_by_me"}
+    projection = {"_id": 0, **{name: 1 for name in sorted(names.union(POST_HYDRATION_FIELDS))}}
+    if include_author and selects(selection, "user"):
+        # Only the selected parts of the embedded author snapshot
+        author_names = {name for name, _ in selection[1]}.intersection(AUTHOR_SNAPSHOT_FIELDS) | {"id"}
+        projection.update({f"author.{name}": 1 for name in sorted(author_names)})
+    return projection
+
 # Auth endpoints
 @api_router.post("/auth/register")
 async def register(user_data: UserRegister):
@@ -228,7 +1983,7 @@ async def register(user_data: UserRegister):
     
     # Create user
     user_id = str(uuid.uuid4())
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     
     user_doc = {
         "id": user_id,
@@ -242,7 +1997,13 @@ async def register(user_data: UserRegister):
         "validations_received": 0
     }
     
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration (users_email is unique)
+        raise HTTPException(status_code=400, detail="Email already registered")
+    leaderboard.upsert(user_doc)
+    response_versions.bump("leaderboard")
     
     # Generate token
     token = create_access_token(user_id)
@@ -268,11 +2029,20 @@ async def login(login_data: UserLogin):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Verify password
-    if not pwd_context.verify(login_data.password, user["password_hash"]):
+    if not await password_hasher.verify(login_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
+    # Upgrade hashes made with a different work factor
+    if password_hasher.needs_rehash(user["password_hash"]):
+        await db.users.update_one(
+            {"id": user["id"]},
+            {"$set": {"password_hash": await password_hasher.hash(login_data.password)}}
+        )
+        password_hasher.rehashed += 1
+    
     # Generate token
     token = create_access_token(user["id"])
+    counter_buffer.apply("users", user)
     
     return {
         "token": token,
@@ -292,51 +2062,61 @@ async def get_me(user_id: str = Depends(get_current_user)):
     user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return counter_buffer.apply("users", user)
 
 # Posts endpoints
-@api_router.post("/posts")
-async def create_post(
-    title: str = Form(...),
-    description: str = Form(...),
-    skill_category: str = Form(...),
-    video: UploadFile = File(...),
-    user_id: str = Depends(get_current_user)
-):
-    # Validate video file
-    if not video.content_type or not video.content_type.startswith("video/"):
-        raise HTTPException(status_code=400, detail="File must be a video")
-    
-    post_id = str(uuid.uuid4())
-    video_url = None
+async def publish_video_post(
+    post_id: str,
+    user_id: str,
+    author: dict,
+    staged_path: Optional[Path],
+    file_extension: str,
+    video_metadata: dict,
+    video_digest: Optional[str],
+    title: str,
+    description: str,
+    skill_category: str,
+    published_url: Optional[str] = None
+) -> dict:
+    """Create a post from a fully received and validated video file.
+
+    The staged file is consumed: it is either spooled for the background
+    cloud upload or moved into the local content-addressed store. If the
+    post cannot be created the file is left at staged_path for the caller,
+    unless the blob store already took it. Videos
+    the client uploaded straight to the storage backend pass their
+    published_url instead, with no staged_path or video_digest (remote
+    objects are not deduplicated). author is the user document
+    read with AUTHOR_SNAPSHOT_PROJECTION when the upload started; the
+    snapshot embedded in the post is taken from a fresh read.
+    """
+    video_filename = f"{post_id}.{file_extension}"
+    stored_blob = False
     
-    if USE_CLOUDINARY:
-        # Upload to Cloudinary
-        try:
-            upload_result = cloudinary.uploader.upload(
-                video.file,
-                resource_type="video",
-                public_id=f"skillproof/{post_id}",
-                folder="skillproof/videos",
-                overwrite=True
-            )
-            video_url = upload_result['secure_url']
-            video_filename = f"cloudinary:{post_id}"
-        except Exception as e:
-            logging.error(f"Cloudinary upload failed: {e}")
-            raise HTTPException(status_code=500, detail="Failed to upload video to cloud storage")
+    if published_url:
+        video_url = published_url
+        post_status = POST_STATUS_READY
+    elif upload_queue:
+        # Spool locally and hand the cloud upload to the background workers
+        spool_path = SPOOL_DIR / video_filename
+        await aiofiles.os.replace(staged_path, spool_path)
+        video_url = ""
+        post_status = POST_STATUS_PROCESSING
     else:
-        # Save to local storage (fallback)
-        file_extension = video.filename.split(".")[-1] if "." in video.filename else "mp4"
-        video_filename = f"{post_id}.{file_extension}"
-        video_path = UPLOADS_DIR / video_filename
-        
+        # Save to local storage (fallback), deduplicated by content hash
         try:
-            with open(video_path, "wb") as buffer:
-                shutil.copyfileobj(video.file, buffer)
+            await optimize_video(staged_path)
+            video_filename = await blob_store.store(staged_path, video_digest, file_extension.lower())
             video_url = f"/uploads/{video_filename}"
+            stored_blob = True
         except Exception as e:
+            logging.error(f"Local video upload failed: {e}")
             raise HTTPException(status_code=500, detail="Failed to upload video")
+        post_status = POST_STATUS_READY
+    
+    # The upload may have taken minutes, during which the author's profile
+    # (and the avatar files it points at) can have changed
+    author = await db.users.find_one({"id": user_id}, AUTHOR_SNAPSHOT_PROJECTION) or author
     
     # Create post document
     post_doc = {
@@ -344,176 +2124,409 @@ async def create_post(
         "user_id": user_id,
         "video_filename": video_filename,
         "video_url": video_url,
+        "video_digest": video_digest,
         "title": title,
         "description": description,
         "skill_category": skill_category,
+        "author": author_snapshot(author),
+        "author_display_name": author["display_name"],
         "created_at": datetime.now(timezone.utc).isoformat(),
-        "validation_count": 0
+        "validation_count": 0,
+        "status": post_status,
+        "video_duration": video_metadata["duration_seconds"],
+        "video_width": video_metadata["width"],
+        "video_height": video_metadata["height"],
+        "video_bitrate": video_metadata["bitrate"]
     }
     
-    await db.posts.insert_one(post_doc)
+    try:
+        await db.posts.insert_one(post_doc)
+    except Exception:
+        if stored_blob:
+            await blob_store.release(video_digest)
+        elif post_status == POST_STATUS_PROCESSING:
+            await aiofiles.os.replace(spool_path, staged_path)
+        raise
+    
+    # A profile change that landed between the read above and the insert
+    # may have been fanned out without this post; rewrite it if so
+    current_author = await db.users.find_one({"id": user_id}, AUTHOR_SNAPSHOT_PROJECTION)
+    if current_author and author_snapshot(current_author)["rev"] != post_doc["author"]["rev"]:
+        author_fanout.schedule(user_id)
     
-    # Update user posts count
-    await db.users.update_one(
-        {"id": user_id},
-        {"$inc": {"posts_count": 1}}
-    )
+    if post_status == POST_STATUS_PROCESSING:
+        if not upload_queue.submit(post_id, spool_path):
+            await db.posts.delete_one({"id": post_id})
+            await aiofiles.os.replace(spool_path, staged_path)
+            raise HTTPException(status_code=503, detail="Too many uploads in progress, please retry shortly")
+    else:
+        # Update user posts count
+        counter_buffer.add("users", user_id, "posts_count")
+        leaderboard.increment(user_id, "posts_count")
+        response_versions.bump("posts", "leaderboard", f"user:{user_id}")
     
     return {
         "id": post_id,
+        "status": post_status,
         "message": "Post created successfully"
     }
 
-@api_router.get("/posts", response_model=List[Post])
-async def get_posts(user_id: str = Depends(get_current_user)):
-    # Get all posts sorted by created_at descending
-    posts = await db.posts.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
+@api_router.post("/posts")
+async def create_post(
+    title: str = Form(...),
+    description: str = Form(...),
+    skill_category: str = Form(...),
+    video: UploadFile = File(...),
+    user_id: str = Depends(get_current_user)
+):
+    """Create a post from a video sent as one multipart form upload.
+
+    The form body is fully received before this runs, so the size, container
+    and duration checks reject a bad video only after the upload finished.
+    Clients that want a bad file refused part-way should use the resumable
+    /uploads endpoints, which inspect each chunk as it arrives.
+    """
+    # Validate video file
+    if not video.content_type or not video.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File must be a video")
     
-    if not posts:
-        return []
+    author = await db.users.find_one({"id": user_id}, AUTHOR_SNAPSHOT_PROJECTION)
+    if not author:
+        raise HTTPException(status_code=404, detail="User not found")
     
-    # Batch fetch all users
-    user_ids = list(set(post["user_id"] for post in posts))
-    users = await db.users.find(
-        {"id": {"$in": user_ids}}, 
-        {"_id": 0, "password_hash": 0}
-    ).to_list(None)
-    users_map = {user["id"]: user for user in users}
+    post_id = str(uuid.uuid4())
+    file_extension = video.filename.split(".")[-1] if "." in video.filename else "mp4"
+    staged_path = SPOOL_DIR / f"staged-{post_id}.{file_extension}"
     
-    # Batch fetch all validations for current user
-    post_ids = [post["id"] for post in posts]
-    validations = await db.validations.find(
-        {"post_id": {"$in": post_ids}, "user_id": user_id},
-        {"_id": 0, "post_id": 1}
-    ).to_list(None)
-    validated_post_ids = {v["post_id"] for v in validations}
+    # Validate container, size and duration while the body streams to disk
+    inspector = VideoInspector(MAX_VIDEO_BYTES, MAX_VIDEO_DURATION_SECONDS)
+    hasher = hashlib.sha256()
+    try:
+        await save_upload(video, staged_path, MAX_VIDEO_BYTES, inspector, hasher)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Video upload failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to upload video")
     
-    # Attach data to posts
-    for post in posts:
-        user = users_map.get(post["user_id"])
-        if user:
-            # Ensure skill_category exists for backward compatibility
-            if "skill_category" not in user:
-                user["skill_category"] = DEFAULT_SKILL_CATEGORIES[0]
-            post["user"] = user
-        
-        # Add video URL - use stored URL if available (Cloudinary), otherwise construct local URL
-        if "video_url" not in post or not post["video_url"]:
-            post["video_url"] = f"/uploads/{post['video_filename']}"
+    try:
+        return await publish_video_post(
+            post_id, user_id, author, staged_path, file_extension,
+            inspector.result, hasher.hexdigest(), title, description, skill_category
+        )
+    except Exception:
+        try:
+            await aiofiles.os.remove(staged_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+# Resumable upload endpoints
+def upload_offset_headers(session: dict) -> dict:
+    return {
+        UPLOAD_OFFSET_HEADER: str(session["offset"]),
+        UPLOAD_LENGTH_HEADER: str(session["size"]),
+        "Cache-Control": "no-store"
+    }
+
+@api_router.post("/uploads", response_model=UploadSession, status_code=201)
+async def create_upload_session(upload: UploadSessionCreate, user_id: str = Depends(get_current_user)):
+    if not upload.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    if upload.size <= 0:
+        raise HTTPException(status_code=400, detail="Upload size must be positive")
+    if upload.size > MAX_VIDEO_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_VIDEO_BYTES} byte size limit")
+    
+    return await upload_sessions.create(user_id, upload.filename, upload.content_type, upload.size)
+
+@api_router.get("/uploads/{upload_id}", response_model=UploadSession)
+async def get_upload_session(upload_id: str, response: Response, user_id: str = Depends(get_current_user)):
+    session = await upload_sessions.get(upload_id, user_id)
+    response.headers.update(upload_offset_headers(session))
+    return session
+
+@api_router.head("/uploads/{upload_id}")
+async def head_upload_session(upload_id: str, user_id: str = Depends(get_current_user)):
+    session = await upload_sessions.get(upload_id, user_id)
+    return Response(status_code=200, headers=upload_offset_headers(session))
+
+@api_router.put("/uploads/{upload_id}", response_model=UploadSession)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    offset: Optional[int] = None,
+    user_id: str = Depends(get_current_user)
+):
+    """Append the raw request body at `offset` (query or Upload-Offset header)."""
+    if offset is None:
+        try:
+            offset = int(request.headers[UPLOAD_OFFSET_HEADER])
+        except (KeyError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Missing or invalid {UPLOAD_OFFSET_HEADER}")
+    
+    async with upload_sessions.lock(upload_id, user_id):
+        session = await upload_sessions.get(upload_id, user_id)
+        if session.get("direct"):
+            raise HTTPException(status_code=409, detail="Direct uploads are sent to storage, not the API")
+        if session["finalizing"]:
+            raise HTTPException(status_code=409, detail="Upload is already being finalized")
+        try:
+            session["offset"] = await upload_sessions.append(session, offset, request.stream())
+        except ClientDisconnect:
+            # Bytes already written were recorded; the client resumes from there
+            raise HTTPException(status_code=400, detail="Upload interrupted")
+        except HTTPException as e:
+            if e.status_code == 400 and offset == 0:
+                await upload_sessions.discard(upload_id)
+            raise
+    
+    response.headers.update(upload_offset_headers(session))
+    return session
+
+@api_router.delete("/uploads/{upload_id}", status_code=204)
+async def cancel_upload_session(upload_id: str, user_id: str = Depends(get_current_user)):
+    async with upload_sessions.lock(upload_id, user_id):
+        session = await upload_sessions.get(upload_id, user_id)
+        if session["finalizing"]:
+            raise HTTPException(status_code=409, detail="Upload is already being finalized")
+        await upload_sessions.discard(upload_id)
+    return Response(status_code=204)
+
+@api_router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload_session(
+    upload_id: str,
+    title: str = Form(...),
+    description: str = Form(...),
+    skill_category: str = Form(...),
+    user_id: str = Depends(get_current_user)
+):
+    author = await db.users.find_one({"id": user_id}, AUTHOR_SNAPSHOT_PROJECTION)
+    if not author:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    async with upload_sessions.lock(upload_id, user_id):
+        session = await upload_sessions.claim(upload_id, user_id)
+        if session.get("direct"):
+            await upload_sessions.release(upload_id)
+            raise HTTPException(status_code=409, detail="Complete direct uploads through /complete")
+        partial_path = upload_sessions.partial_path(upload_id)
+        try:
+            video_metadata, video_digest = await inspect_video_file(partial_path)
+        except MediaError as e:
+            await upload_sessions.discard(upload_id)
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logging.error(f"Video upload failed: {e}")
+            await upload_sessions.release(upload_id)
+            raise HTTPException(status_code=500, detail="Failed to upload video")
+    
+    post_id = str(uuid.uuid4())
+    filename = session["filename"]
+    file_extension = filename.split(".")[-1] if "." in filename else "mp4"
+    # Publish straight from the partial file; the session (and the file, if
+    # publishing did not consume it) stays until the post exists
+    try:
+        result = await publish_video_post(
+            post_id, user_id, author, partial_path, file_extension,
+            video_metadata, video_digest, title, description, skill_category
+        )
+    except Exception:
+        async with upload_sessions.lock(upload_id):
+            if await aiofiles.os.path.exists(partial_path):
+                await upload_sessions.release(upload_id)
+            else:
+                await upload_sessions.discard(upload_id)
+        raise
+    
+    async with upload_sessions.lock(upload_id):
+        await upload_sessions.discard(upload_id, keep_file=True)
+    return result
+
+@api_router.post("/uploads/direct", status_code=201)
+async def create_direct_upload(upload: UploadSessionCreate, user_id: str = Depends(get_current_user)):
+    """Start an upload the client sends straight to the storage backend.
+
+    Returns presigned URLs: either a single `url` to PUT the whole file to,
+    or one URL per `parts` entry, each taking `part_size` bytes (the last
+    part takes the rest). Finish with POST /uploads/{id}/complete.
+    """
+    if not storage_backend or not storage_backend.supports_direct_upload:
+        raise HTTPException(status_code=404, detail="Direct uploads are not enabled")
+    if not upload.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    if upload.size <= 0:
+        raise HTTPException(status_code=400, detail="Upload size must be positive")
+    if upload.size > MAX_VIDEO_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_VIDEO_BYTES} byte size limit")
+    
+    post_id = str(uuid.uuid4())
+    file_extension = upload.filename.split(".")[-1] if "." in upload.filename else "mp4"
+    key = f"{post_id}.{file_extension}"
+    direct = await storage_backend.create_direct_upload(key, upload.content_type, upload.size)
+    session = await upload_sessions.create_direct(
+        user_id, upload.filename, upload.content_type, upload.size, post_id, key, direct["upload_id"]
+    )
+    direct.pop("upload_id")
+    return {"id": session["id"], "size": session["size"], "expires_at": session["expires_at"], **direct}
+
+@api_router.post("/uploads/{upload_id}/complete")
+async def complete_direct_upload(
+    upload_id: str,
+    completion: DirectUploadComplete,
+    user_id: str = Depends(get_current_user)
+):
+    author = await db.users.find_one({"id": user_id}, AUTHOR_SNAPSHOT_PROJECTION)
+    if not author:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    async with upload_sessions.lock(upload_id, user_id):
+        session = await upload_sessions.claim(upload_id, user_id)
+        if not session.get("direct"):
+            await upload_sessions.release(upload_id)
+            raise HTTPException(status_code=409, detail="Finalize API uploads through /finalize")
         
-        # Ensure skill_category exists in post for backward compatibility
-        if "skill_category" not in post:
-            post["skill_category"] = DEFAULT_SKILL_CATEGORIES[0]
+        try:
+            size = await storage_backend.complete_direct_upload(
+                session["key"], session["upload_id"], [part.model_dump() for part in completion.parts]
+            )
+        except StorageError as e:
+            await upload_sessions.release(upload_id)
+            raise HTTPException(status_code=400, detail=str(e))
+        if size != session["size"]:
+            await upload_sessions.discard(upload_id)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Uploaded {size} bytes but {session['size']} were declared"
+            )
         
-        # Check if current user validated this post
-        post["is_validated_by_me"] = post["id"] in validated_post_ids
+        # Validate the stored object like API uploads, reading only its headers
+        # and moov box with ranged GETs so the media data never passes through
+        try:
+            video_metadata = await inspect_ranges(
+                lambda start, length: storage_backend.read_range(session["key"], start, length),
+                size, MAX_VIDEO_BYTES, MAX_VIDEO_DURATION_SECONDS
+            )
+        except MediaError as e:
+            await upload_sessions.discard(upload_id)
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logging.error(f"Direct upload validation failed: {e}")
+            await upload_sessions.release(upload_id)
+            raise HTTPException(status_code=500, detail="Failed to upload video")
+        await upload_sessions.discard(upload_id, keep_file=True)
     
-    return posts
+    file_extension = session["key"].rsplit(".", 1)[-1]
+    return await publish_video_post(
+        session["post_id"], user_id, author, None, file_extension,
+        video_metadata, None, completion.title, completion.description,
+        completion.skill_category, published_url=storage_backend.public_url(session["key"])
+    )
+
+@api_router.get("/posts", response_model=List[Post])
+async def get_posts(
+    request: Request,
+    response: Response,
+    limit: int = DEFAULT_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+    user_id: str = Depends(get_current_user)
+):
+    selection = parse_field_selection(fields, view)
+    
+    # The page embeds the viewer's own validation state, so the tag varies by viewer
+    etag = response_versions.etag("posts", user_id, page_limit(limit), cursor, selection)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    # One page of posts sorted by created_at descending, shared by all viewers
+    posts, next_cursor = await feed_cache.get_page(page_limit(limit), cursor, selection, user_id)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return post_list_response(posts, response, selection)
 
 # Search/filter posts endpoint
 @api_router.get("/posts/search", response_model=List[Post])
 async def search_posts(
+    response: Response,
     query: Optional[str] = None,
     skill_category: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
     user_id: str = Depends(get_current_user)
 ):
+    selection = parse_field_selection(fields, view)
+    
     # Build search filter
-    search_filter = {}
+    search_filter = dict(VISIBLE_POSTS_FILTER)
     
     if skill_category and skill_category != "all":
         search_filter["skill_category"] = skill_category
     
-    # Get posts
-    posts = await db.posts.find(search_filter, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    if not posts:
-        return []
-    
-    # Batch fetch all users
-    user_ids = list(set(post["user_id"] for post in posts))
-    users = await db.users.find(
-        {"id": {"$in": user_ids}}, 
-        {"_id": 0, "password_hash": 0}
-    ).to_list(None)
-    users_map = {user["id"]: user for user in users}
-    
-    # Attach user info to all posts first
-    for post in posts:
-        user = users_map.get(post["user_id"])
-        if user:
-            # Ensure skill_category exists for backward compatibility
-            if "skill_category" not in user:
-                user["skill_category"] = DEFAULT_SKILL_CATEGORIES[0]
-            post["user"] = user
-    
-    # Filter by query if provided (search in title, description, or user display_name)
-    if query:
-        filtered_posts = []
-        for post in posts:
-            if post.get("user") and (query.lower() in post["title"].lower() or 
-                query.lower() in post["description"].lower() or 
-                query.lower() in post["user"]["display_name"].lower()):
-                filtered_posts.append(post)
-        posts = filtered_posts
+    # Full-text search over title, description and author display_name
+    lookups = hydration_stages(user_id, selection=selection)
+    if query and query.strip():
+        posts, next_cursor = await search_posts_page(
+            query, search_filter, page_limit(limit), cursor, posts_projection(selection), lookups
+        )
+    else:
+        posts, next_cursor = await fetch_posts_page(
+            search_filter, page_limit(limit), cursor, posts_projection(selection), lookups
+        )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
-    # Batch fetch all validations for current user
-    post_ids = [post["id"] for post in posts]
-    validations = await db.validations.find(
-        {"post_id": {"$in": post_ids}, "user_id": user_id},
-        {"_id": 0, "post_id": 1}
-    ).to_list(None)
-    validated_post_ids = {v["post_id"] for v in validations}
+    return post_list_response(finish_hydration(posts), response, selection)
+
+@api_router.get("/posts:batch", response_model=List[Post])
+async def get_posts_batch(
+    response: Response,
+    ids: str,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+    user_id: str = Depends(get_current_user)
+):
+    """Posts for up to MAX_BATCH_IDS ids in request order; unknown or hidden ids are left out."""
+    post_ids = parse_id_list(ids)
+    selection = parse_field_selection(fields, view)
     
-    # Add video URL and validation status
-    for post in posts:
-        # Ensure skill_category exists in post for backward compatibility
-        if "skill_category" not in post:
-            post["skill_category"] = DEFAULT_SKILL_CATEGORIES[0]
-        
-        post["video_url"] = f"/uploads/{post['video_filename']}"
-        post["is_validated_by_me"] = post["id"] in validated_post_ids
+    # Posts still processing (or failed) are only visible to their author
+    posts = await db.posts.aggregate([
+        {"$match": {"id": {"$in": post_ids}, "$or": [VISIBLE_POSTS_FILTER, {"user_id": user_id}]}},
+        {"$project": posts_projection(selection)},
+        *hydration_stages(user_id, selection=selection),
+    ]).to_list(len(post_ids))
+    by_id = {post["id"]: post for post in finish_hydration(posts)}
     
-    return posts
+    return post_list_response([by_id[post_id] for post_id in post_ids if post_id in by_id], response, selection)
 
 @api_router.get("/posts/{post_id}", response_model=Post)
 async def get_post(post_id: str, user_id: str = Depends(get_current_user)):
-    post = await db.posts.find_one({"id": post_id}, {"_id": 0})
-    if not post:
+    # Post, author and validation status in one round-trip
+    posts = await db.posts.aggregate([
+        {"$match": {"id": post_id}},
+        {"$limit": 1},
+        {"$project": {"_id": 0}},
+        *hydration_stages(user_id),
+    ]).to_list(1)
+    if not posts:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    # Get user info
-    user = await db.users.find_one({"id": post["user_id"]}, {"_id": 0, "password_hash": 0})
-    if user:
-        post["user"] = user
-    
-    # Add video URL
-    post["video_url"] = f"/uploads/{post['video_filename']}"
-    
-    # Check if current user validated this post
-    validation = await db.validations.find_one(
-        {"post_id": post_id, "user_id": user_id},
-        {"_id": 0}
-    )
-    post["is_validated_by_me"] = validation is not None
+    # Posts still processing (or failed) are only visible to their author
+    post = posts[0]
+    if post.get("status", POST_STATUS_READY) != POST_STATUS_READY and post["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Post not found")
     
-    return post
+    return finish_hydration(posts)[0]
 
 @api_router.post("/posts/{post_id}/validate")
 async def validate_post(post_id: str, user_id: str = Depends(get_current_user)):
-    # Check if post exists
-    post = await db.posts.find_one({"id": post_id}, {"_id": 0})
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Check if user already validated this post
-    existing_validation = await db.validations.find_one(
-        {"post_id": post_id, "user_id": user_id},
-        {"_id": 0}
-    )
-    if existing_validation:
-        raise HTTPException(status_code=400, detail="You already validated this post")
-    
-    # Create validation
     validation_doc = {
         "id": str(uuid.uuid4()),
         "post_id": post_id,
@@ -521,52 +2534,87 @@ async def validate_post(post_id: str, user_id: str = Depends(get_current_user)):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.validations.insert_one(validation_doc)
-    
-    # Update post validation count
-    await db.posts.update_one(
-        {"id": post_id},
-        {"$inc": {"validation_count": 1}}
+    # Look up the post owner while inserting the validation. The unique
+    # (post_id, user_id) index makes the insert itself the duplicate check,
+    # so concurrent requests from the same user can't both succeed.
+    post, inserted = await asyncio.gather(
+        db.posts.find_one({"id": post_id}, {"_id": 0, "user_id": 1, "status": 1}),
+        db.validations.insert_one(validation_doc),
+        return_exceptions=True
     )
+    if isinstance(post, Exception):
+        raise post
+    if not post or post.get("status", POST_STATUS_READY) != POST_STATUS_READY:
+        if not isinstance(inserted, Exception):
+            await db.validations.delete_one({"id": validation_doc["id"]})
+        raise HTTPException(status_code=404, detail="Post not found")
+    if isinstance(inserted, DuplicateKeyError):
+        raise HTTPException(status_code=400, detail="You already validated this post")
+    if isinstance(inserted, Exception):
+        raise inserted
     
-    # Update post owner's validations_received count
-    await db.users.update_one(
-        {"id": post["user_id"]},
-        {"$inc": {"validations_received": 1}}
-    )
+    # Update post validation count and post owner's validations_received count
+    counter_buffer.add("posts", post_id, "validation_count")
+    counter_buffer.add("users", post["user_id"], "validations_received")
+    leaderboard.increment(post["user_id"], "validations_received")
+    response_versions.bump("posts", "leaderboard", f"user:{post['user_id']}")
     
     return {"message": "Post validated successfully"}
 
+@api_router.get("/validations/mine", response_model=Dict[str, bool])
+async def get_my_validations(post_ids: str, user_id: str = Depends(get_current_user)):
+    """Whether the current user has validated each of up to MAX_BATCH_IDS posts."""
+    post_id_list = parse_id_list(post_ids, "post_ids")
+    validations = await db.validations.find(
+        {"post_id": {"$in": post_id_list}, "user_id": user_id},
+        {"_id": 0, "post_id": 1}
+    ).to_list(None)
+    validated_post_ids = {v["post_id"] for v in validations}
+    return {post_id: post_id in validated_post_ids for post_id in post_id_list}
+
+@api_router.get("/users:batch", response_model=List[User])
+async def get_users_batch(ids: str):
+    """Profiles for up to MAX_BATCH_IDS ids in request order; unknown ids are left out."""
+    user_ids = parse_id_list(ids)
+    users = await profile_cache.get_many(user_ids)
+    return [counter_buffer.apply("users", users[user_id]) for user_id in user_ids if user_id in users]
+
 @api_router.get("/users/{user_id_param}", response_model=User)
-async def get_user_profile(user_id_param: str):
-    user = await db.users.find_one({"id": user_id_param}, {"_id": 0, "password_hash": 0})
+async def get_user_profile(user_id_param: str, request: Request, response: Response):
+    etag = response_versions.etag(f"user:{user_id_param}")
+    not_modified = conditional_response(request, response, etag, "public, no-cache")
+    if not_modified:
+        return not_modified
+    
+    user = await profile_cache.get(user_id_param)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return counter_buffer.apply("users", user)
 
 @api_router.get("/users/{user_id_param}/posts", response_model=List[Post])
-async def get_user_posts(user_id_param: str, user_id: str = Depends(get_current_user)):
-    posts = await db.posts.find({"user_id": user_id_param}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    if not posts:
-        return []
-    
-    # Batch fetch all validations for current user
-    post_ids = [post["id"] for post in posts]
-    validations = await db.validations.find(
-        {"post_id": {"$in": post_ids}, "user_id": user_id},
-        {"_id": 0, "post_id": 1}
-    ).to_list(None)
-    validated_post_ids = {v["post_id"] for v in validations}
+async def get_user_posts(
+    user_id_param: str,
+    response: Response,
+    limit: int = DEFAULT_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+    user_id: str = Depends(get_current_user)
+):
+    selection = parse_field_selection(fields, view)
     
-    for post in posts:
-        # Add video URL
-        post["video_url"] = f"/uploads/{post['video_filename']}"
-        
-        # Check if current user validated this post
-        post["is_validated_by_me"] = post["id"] in validated_post_ids
+    # Authors also see their own posts that are still processing or failed
+    query = {"user_id": user_id_param}
+    if user_id_param != user_id:
+        query.update(VISIBLE_POSTS_FILTER)
+    posts, next_cursor = await fetch_posts_page(
+        query, page_limit(limit), cursor, posts_projection(selection, include_author=False),
+        hydration_stages(user_id, selection=selection)
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
-    return posts
+    return post_list_response(finish_hydration(posts), response, selection)
 
 # Avatar upload endpoint
 @api_router.post("/users/avatar")
@@ -578,25 +2626,49 @@ async def upload_avatar(
     if not avatar.content_type or not avatar.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Save avatar file
+    # Stage the original, then derive the resized variants from it
     file_extension = avatar.filename.split(".")[-1] if "." in avatar.filename else "jpg"
-    avatar_filename = f"{user_id}.{file_extension}"
-    avatar_path = AVATARS_DIR / avatar_filename
+    staged_path = SPOOL_DIR / f"avatar-{user_id}-{uuid.uuid4().hex}.{file_extension}"
+    hasher = hashlib.sha256()
     
     try:
-        with open(avatar_path, "wb") as buffer:
-            shutil.copyfileobj(avatar.file, buffer)
+        await save_upload(avatar, staged_path, MAX_AVATAR_BYTES, hasher=hasher)
+        # Variant names carry a content hash, so their URLs can be cached forever
+        version = hasher.hexdigest()[:16]
+        user_avatars_dir = AVATARS_DIR / user_id
+        variants = await asyncio.to_thread(make_avatar_variants, staged_path, user_avatars_dir, version)
+    except HTTPException:
+        raise
+    except ImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        logging.error(f"Avatar upload failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to upload avatar")
+    finally:
+        try:
+            await aiofiles.os.remove(staged_path)
+        except FileNotFoundError:
+            pass
     
-    # Update user avatar URL
-    avatar_url = f"/uploads/avatars/{avatar_filename}"
+    # Update user avatar URLs
+    avatar_urls = {
+        variant: f"/uploads/avatars/{user_id}/{filename}"
+        for variant, filename in variants.items()
+    }
+    avatar_url = avatar_urls[AVATAR_PROFILE_VARIANT]
     await db.users.update_one(
         {"id": user_id},
-        {"$set": {"avatar_url": avatar_url}}
+        {"$set": {"avatar_url": avatar_url, "avatar_urls": avatar_urls, "author_fanout_pending": True}}
     )
+    profile_cache.invalidate(user_id)
+    leaderboard.update(user_id, avatar_url=avatar_urls[AVATAR_LIST_VARIANT])
+    response_versions.bump("leaderboard", f"user:{user_id}")
+    
+    # Rewrite the author snapshot in the user's posts; variants of earlier
+    # avatars are deleted once no post refers to them
+    author_fanout.schedule(user_id)
     
-    return {"avatar_url": avatar_url, "message": "Avatar uploaded successfully"}
+    return {"avatar_url": avatar_url, "avatar_urls": avatar_urls, "message": "Avatar uploaded successfully"}
 
 # Skill categories endpoint
 @api_router.get("/skill-categories")
@@ -618,20 +2690,47 @@ async def health_check():
         "database": "connected" if client else "disconnected"
     }
 
-# Leaderboard endpoint
+# Runtime metrics endpoint
+@api_router.get("/metrics")
+async def get_metrics():
+    """In-process cache and buffer statistics, used to size the caches."""
+    return {
+        "profile_cache": profile_cache.stats(),
+        "feed_cache": feed_cache.stats(),
+        "author_fanout": author_fanout.stats(),
+        "upload_queue": upload_queue.stats() if upload_queue else None,
+        "password_hasher": password_hasher.stats(),
+        "media_head_cache": head_cache.stats(),
+    }
+
+# Leaderboard endpoints
 @api_router.get("/leaderboard", response_model=List[LeaderboardUser])
-async def get_leaderboard(limit: int = 10):
-    users = await db.users.find(
-        {},
-        {"_id": 0, "password_hash": 0, "email": 0}
-    ).sort("validations_received", -1).limit(limit).to_list(limit)
-    
-    # Ensure skill_category exists for backward compatibility
-    for user in users:
-        if "skill_category" not in user:
-            user["skill_category"] = DEFAULT_SKILL_CATEGORIES[0]
-    
-    return users
+async def get_leaderboard(
+    request: Request,
+    response: Response,
+    limit: int = 10,
+    skill_category: Optional[str] = None
+):
+    if skill_category == "all":
+        skill_category = None
+    etag = response_versions.etag("leaderboard", page_limit(limit), skill_category)
+    not_modified = conditional_response(request, response, etag, "public, no-cache")
+    if not_modified:
+        return not_modified
+    return leaderboard.top(page_limit(limit), skill_category)
+
+@api_router.get("/leaderboard/me", response_model=LeaderboardRank)
+async def get_my_rank(skill_category: Optional[str] = None, user_id: str = Depends(get_current_user)):
+    return await get_user_rank(user_id, skill_category)
+
+@api_router.get("/leaderboard/rank/{user_id_param}", response_model=LeaderboardRank)
+async def get_user_rank(user_id_param: str, skill_category: Optional[str] = None):
+    if skill_category == "all":
+        skill_category = None
+    rank = leaderboard.rank(user_id_param, skill_category)
+    if not rank:
+        raise HTTPException(status_code=404, detail="User not ranked")
+    return rank
 
 # Include router
 app.include_router(api_router)
@@ -642,6 +2741,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, UPLOAD_OFFSET_HEADER, UPLOAD_LENGTH_HEADER],
 )
 
 # Configure logging
@@ -651,6 +2751,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_client():
+    await bootstrap_indexes(db)
+    await leaderboard.rebuild()
+    await backfill_author_snapshots()
+    counter_buffer.start()
+    blob_store.start()
+    upload_sessions.start()
+    await author_fanout.start()
+    if upload_queue:
+        await upload_queue.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if upload_queue:
+        await upload_queue.stop()
+    await author_fanout.stop()
+    await upload_sessions.stop()
+    await blob_store.stop()
+    await counter_buffer.stop()
     client.close()
\ No newline at end of file
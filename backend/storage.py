@@ -0,0 +1,285 @@
+"""Storage backends for published videos.
+
+Every backend takes a finished file and a key (`<post id>.<ext>`) and
+returns the public URL the video is served from:
+
+    LocalStorage        copies into a directory served under /uploads
+                        (an offline stand-in for cloud storage)
+    CloudinaryStorage   uploads through the Cloudinary SDK
+    S3Storage           any S3-compatible bucket (AWS, MinIO, moto)
+
+The SDKs are blocking, so every call runs in a worker thread. S3Storage
+also lets clients upload straight to the bucket with presigned URLs, so
+the video bytes never pass through the API. Backends that can't do that
+keep supports_direct_upload = False.
+"""
+import asyncio
+import math
+from abc import ABC, abstractmethod
+import mimetypes
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+import cloudinary.uploader
+import cloudinary.utils
+
+# S3 rejects multipart parts below 5 MiB (except the last) and uploads with
+# more than 10,000 parts
+S3_MIN_PART_BYTES = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+
+
+class StorageError(Exception):
+    """Raised when a backend rejects an operation or a direct upload is invalid."""
+
+
+def guess_content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class StorageBackend(ABC):
+    """Interface shared by the storage backends."""
+
+    name = "base"
+    supports_direct_upload = False
+
+    @abstractmethod
+    async def upload(self, path: Path, key: str) -> str:
+        """Publish the file at path under key and return its public URL."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove a published file; a missing one is not an error."""
+
+    async def create_direct_upload(self, key: str, content_type: str, size: int) -> dict:
+        raise StorageError(f"{self.name} storage does not support direct uploads")
+
+    async def complete_direct_upload(self, key: str, upload_id: Optional[str], parts: List[dict]) -> int:
+        raise StorageError(f"{self.name} storage does not support direct uploads")
+
+    async def abort_direct_upload(self, key: str, upload_id: Optional[str]):
+        pass
+
+    async def read_range(self, key: str, start: int, length: int) -> bytes:
+        """Read length bytes of a stored object from offset start."""
+        raise StorageError(f"{self.name} storage cannot read objects back")
+
+    @abstractmethod
+    def public_url(self, key: str) -> str:
+        """The URL a file published under key is served from."""
+
+
+class LocalStorage(StorageBackend):
+    """Publishes into a local directory served by the API itself."""
+
+    name = "local"
+
+    def __init__(self, root: Path, url_prefix: str, delay_seconds: float = 0):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+        self.delay_seconds = delay_seconds
+
+    async def upload(self, path: Path, key: str) -> str:
+        if self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(shutil.copyfile, path, target)
+        return self.public_url(key)
+
+    async def delete(self, key: str):
+        try:
+            await asyncio.to_thread((self.root / key).unlink)
+        except FileNotFoundError:
+            pass
+
+    def public_url(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+
+class CloudinaryStorage(StorageBackend):
+    """Publishes videos to Cloudinary; cloudinary.config() must already be set."""
+
+    name = "cloudinary"
+
+    def __init__(self, folder: str = "skillproof/videos"):
+        self.folder = folder
+
+    @staticmethod
+    def public_id(key: str) -> str:
+        return f"skillproof/{Path(key).stem}"
+
+    def asset_id(self, key: str) -> str:
+        # Cloudinary stores the asset under the folder followed by the public_id
+        return f"{self.folder}/{self.public_id(key)}"
+
+    async def upload(self, path: Path, key: str) -> str:
+        upload_result = await asyncio.to_thread(
+            cloudinary.uploader.upload,
+            str(path),
+            resource_type="video",
+            public_id=self.public_id(key),
+            folder=self.folder,
+            overwrite=True
+        )
+        return upload_result['secure_url']
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(cloudinary.uploader.destroy, self.asset_id(key), resource_type="video")
+
+    def public_url(self, key: str) -> str:
+        url, _ = cloudinary.utils.cloudinary_url(
+            self.asset_id(key), resource_type="video", secure=True, format=Path(key).suffix.lstrip(".") or None
+        )
+        return url
+
+
+class S3Storage(StorageBackend):
+    """Publishes to an S3-compatible bucket through a boto3 client.
+
+    Files larger than part_size are sent as a multipart upload with up to
+    concurrency parts in flight. Direct uploads hand the client presigned
+    URLs: a single PUT for small files, or one URL per part for a multipart
+    upload the client completes through the API.
+    """
+
+    name = "s3"
+    supports_direct_upload = True
+
+    def __init__(self, client, bucket: str, key_prefix: str = "", public_base_url: Optional[str] = None,
+                 part_size: int = 8 * 1024 * 1024, concurrency: int = 4, presign_expires_seconds: int = 3600):
+        self.client = client
+        self.bucket = bucket
+        self.key_prefix = key_prefix.strip("/")
+        self.public_base_url = (public_base_url or f"{client.meta.endpoint_url}/{bucket}").rstrip("/")
+        self.part_size = max(part_size, S3_MIN_PART_BYTES)
+        self.concurrency = concurrency
+        self.presign_expires_seconds = presign_expires_seconds
+
+    def object_key(self, key: str) -> str:
+        return f"{self.key_prefix}/{key}" if self.key_prefix else key
+
+    def public_url(self, key: str) -> str:
+        return f"{self.public_base_url}/{self.object_key(key)}"
+
+    def part_size_for(self, size: int) -> int:
+        return max(self.part_size, math.ceil(size / S3_MAX_PARTS))
+
+    def _upload_part(self, path: Path, object_key: str, upload_id: str, part_number: int,
+                     start: int, length: int) -> str:
+        with open(path, "rb") as source:
+            source.seek(start)
+            body = source.read(length)
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=object_key, UploadId=upload_id, PartNumber=part_number, Body=body
+        )
+        return response["ETag"]
+
+    async def _multipart_upload(self, path: Path, object_key: str, content_type: str, size: int):
+        part_size = self.part_size_for(size)
+        upload = await asyncio.to_thread(
+            self.client.create_multipart_upload, Bucket=self.bucket, Key=object_key, ContentType=content_type
+        )
+        upload_id = upload["UploadId"]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(part_number: int):
+            start = (part_number - 1) * part_size
+            async with semaphore:
+                etag = await asyncio.to_thread(
+                    self._upload_part, path, object_key, upload_id, part_number, start, min(part_size, size - start)
+                )
+            return {"PartNumber": part_number, "ETag": etag}
+
+        try:
+            parts = await asyncio.gather(*(send(n) for n in range(1, math.ceil(size / part_size) + 1)))
+            await asyncio.to_thread(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id, MultipartUpload={"Parts": list(parts)}
+            )
+        except BaseException:
+            await asyncio.to_thread(
+                self.client.abort_multipart_upload, Bucket=self.bucket, Key=object_key, UploadId=upload_id
+            )
+            raise
+
+    async def upload(self, path: Path, key: str) -> str:
+        object_key = self.object_key(key)
+        content_type = guess_content_type(key)
+        size = path.stat().st_size
+        if size > self.part_size:
+            await self._multipart_upload(path, object_key, content_type, size)
+        else:
+            await asyncio.to_thread(
+                self.client.upload_file, str(path), self.bucket, object_key,
+                ExtraArgs={"ContentType": content_type}
+            )
+        return self.public_url(key)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self.object_key(key))
+
+    def _presign(self, method: str, **params) -> str:
+        return self.client.generate_presigned_url(
+            method, Params={"Bucket": self.bucket, **params}, ExpiresIn=self.presign_expires_seconds
+        )
+
+    async def create_direct_upload(self, key: str, content_type: str, size: int) -> dict:
+        """Start a client-side upload; returns what the client needs to send the bytes."""
+        object_key = self.object_key(key)
+        if size <= self.part_size:
+            url = await asyncio.to_thread(self._presign, "put_object", Key=object_key, ContentType=content_type)
+            return {"upload_id": None, "url": url, "headers": {"Content-Type": content_type}}
+
+        part_size = self.part_size_for(size)
+        upload = await asyncio.to_thread(
+            self.client.create_multipart_upload, Bucket=self.bucket, Key=object_key, ContentType=content_type
+        )
+        upload_id = upload["UploadId"]
+        parts = []
+        for part_number in range(1, math.ceil(size / part_size) + 1):
+            url = self._presign("upload_part", Key=object_key, UploadId=upload_id, PartNumber=part_number)
+            parts.append({"part_number": part_number, "url": url})
+        return {"upload_id": upload_id, "part_size": part_size, "parts": parts}
+
+    async def complete_direct_upload(self, key: str, upload_id: Optional[str], parts: List[dict]) -> int:
+        """Complete a direct upload and return the stored object's size."""
+        object_key = self.object_key(key)
+        try:
+            if upload_id:
+                await asyncio.to_thread(
+                    self.client.complete_multipart_upload,
+                    Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                    MultipartUpload={"Parts": [
+                        {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                        for part in sorted(parts, key=lambda part: part["part_number"])
+                    ]}
+                )
+            head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=object_key)
+        except self.client.exceptions.ClientError as e:
+            raise StorageError(f"Direct upload could not be completed: {e}")
+        return head["ContentLength"]
+
+    async def abort_direct_upload(self, key: str, upload_id: Optional[str]):
+        object_key = self.object_key(key)
+        if upload_id:
+            try:
+                await asyncio.to_thread(
+                    self.client.abort_multipart_upload, Bucket=self.bucket, Key=object_key, UploadId=upload_id
+                )
+            except self.client.exceptions.ClientError:
+                pass
+        await self.delete(key)
+
+    def _get_range(self, object_key: str, start: int, length: int) -> bytes:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=object_key, Range=f"bytes={start}-{start + length - 1}"
+        )
+        with response["Body"] as body:
+            return body.read()
+
+    async def read_range(self, key: str, start: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        return await asyncio.to_thread(self._get_range, self.object_key(key), start, length)
@@ -4,6 +4,29 @@ import json
 import os
 from datetime import datetime
 import uuid
+import struct
+import zlib
+
+def mp4_box(box_type, body):
+    return struct.pack('>I4s', len(body) + 8, box_type) + body
+
+def make_test_png(width=4, height=4):
+    """Build a small decodable RGB PNG"""
+    def chunk(chunk_type, data):
+        return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+    rows = b''.join(b'\x00' + b'\x04\x78\x57' * width for _ in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
+
+def make_test_mp4(duration_seconds=5, width=640, height=360):
+    """Build a minimal well-formed MP4: ftyp, moov (movie header and one video track) and mdat"""
+    mvhd = mp4_box(b'mvhd', b'\x00' * 12 + struct.pack('>II', 1000, duration_seconds * 1000) + b'\x00' * 80)
+    tkhd = mp4_box(b'tkhd', b'\x00' * 76 + struct.pack('>II', width << 16, height << 16))
+    hdlr = mp4_box(b'hdlr', b'\x00' * 8 + b'vide' + b'\x00' * 12)
+    stco = mp4_box(b'stco', b'\x00' * 4 + struct.pack('>I', 0))
+    trak = mp4_box(b'trak', tkhd + mp4_box(b'mdia', hdlr + mp4_box(b'minf', mp4_box(b'stbl', stco))))
+    ftyp = mp4_box(b'ftyp', b'mp42\x00\x00\x00\x00mp42isom')
+    return ftyp + mp4_box(b'moov', mvhd + trak) + mp4_box(b'mdat', b'\x00' * 1024)
 
 class SkillProofAPITester:
     def __init__(self, base_url="https://skillshare-demo.preview.emergentagent.com"):
@@ -139,8 +162,8 @@ class SkillProofAPITester:
 
     def test_create_post(self):
         """Test creating a post with video upload"""
-        # Create a simple test video file (minimal MP4 header)
-        test_video_content = b'\x00\x00\x00\x20ftypmp42\x00\x00\x00\x00mp42isom\x00\x00\x00\x08free'
+        # Uploads are inspected, so the file must be a complete MP4 with moov and mdat
+        test_video_content = make_test_mp4()
         
         data = {
             'title': 'Test Skill Proof',
@@ -369,8 +392,8 @@ class SkillProofAPITester:
 
     def test_upload_avatar(self):
         """Test uploading user avatar"""
-        # Create a simple test image file (minimal PNG header)
-        test_image_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde'
+        # Avatars are decoded and resized, so the image must be a complete PNG
+        test_image_content = make_test_png()
         
         files = {
             'avatar': ('test_avatar.png', test_image_content, 'image/png')
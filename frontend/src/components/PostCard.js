@@ -5,11 +5,18 @@ import { useAuth } from '@/contexts/AuthContext';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
+// Authors see their own posts while the video is still uploading or after it failed
+export const VIDEO_STATUS_MESSAGES = {
+  processing: 'Processing video…',
+  failed: 'Video upload failed',
+};
+
 export default function PostCard({ post, onValidate }) {
   const navigate = useNavigate();
   const { user } = useAuth();
   const [showValidationAnimation, setShowValidationAnimation] = useState(false);
   const [isHovered, setIsHovered] = useState(false);
+  const statusMessage = VIDEO_STATUS_MESSAGES[post.status];
 
   const handleValidate = async () => {
     setShowValidationAnimation(true);
@@ -33,15 +40,24 @@ export default function PostCard({ post, onValidate }) {
       )}
 
       <div className="relative bg-black video-container group" style={{ minHeight: '300px', maxHeight: '600px' }}>
-        <video
-          src={`${BACKEND_URL}${post.video_url}`}
-          controls
-          preload="metadata"
-          muted
-          playsInline
-          className="w-full h-full max-h-[600px]"
-          data-testid="post-video"
-        />
+        {statusMessage ? (
+          <div
+            className="absolute inset-0 flex items-center justify-center text-sm font-medium uppercase tracking-wider text-zinc-300"
+            data-testid="post-video-status"
+          >
+            {statusMessage}
+          </div>
+        ) : (
+          <video
+            src={`${BACKEND_URL}${post.video_url}`}
+            controls
+            preload="metadata"
+            muted
+            playsInline
+            className="w-full h-full max-h-[600px]"
+            data-testid="post-video"
+          />
+        )}
         {isHovered && (
           <div className="absolute inset-0 bg-gradient-to-t from-black/50 to-transparent pointer-events-none transition-opacity duration-300" />
         )}
@@ -58,6 +74,16 @@ export default function PostCard({ post, onValidate }) {
                 {post.skill_category}
               </span>
             )}
+            {statusMessage && (
+              <span
+                className={`text-xs px-2 py-1 rounded-full font-medium uppercase tracking-wider ${
+                  post.status === 'failed' ? 'bg-red-100 text-red-700' : 'bg-zinc-100 text-zinc-600'
+                }`}
+                data-testid="post-status-badge"
+              >
+                {post.status}
+              </span>
+            )}
           </div>
           <p className="text-base text-zinc-600 leading-relaxed" data-testid="post-description">
             {post.description}
@@ -80,7 +106,7 @@ export default function PostCard({ post, onValidate }) {
             </span>
           </div>
 
-          {post.is_validated_by_me ? (
+          {statusMessage ? null : post.is_validated_by_me ? (
             <Button
               disabled
               className="h-11 px-6 rounded-full bg-zinc-100 text-zinc-500 font-bold uppercase tracking-wide cursor-not-allowed"
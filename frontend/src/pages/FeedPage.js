@@ -22,6 +22,9 @@ export default function FeedPage() {
   const [selectedCategory, setSelectedCategory] = useState('all');
   const [skillCategories, setSkillCategories] = useState([]);
   const [showFilters, setShowFilters] = useState(false);
+  // The next page's cursor, kept with the endpoint and params that produced it
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchSkillCategories();
@@ -37,10 +40,16 @@ export default function FeedPage() {
     }
   };
 
+  const rememberNextPage = (endpoint, params, response) => {
+    const cursor = response.headers['x-next-cursor'];
+    setNextPage(cursor ? { endpoint, params: params.toString(), cursor } : null);
+  };
+
   const fetchPosts = async () => {
     try {
       const response = await axios.get(`${API}/posts`);
       setPosts(response.data);
+      rememberNextPage('posts', new URLSearchParams(), response);
     } catch (error) {
       console.error('Failed to fetch posts:', error);
       toast.error('Failed to load posts');
@@ -49,15 +58,20 @@ export default function FeedPage() {
     }
   };
 
+  const searchParams = () => {
+    const params = new URLSearchParams();
+    if (searchQuery) params.append('query', searchQuery);
+    if (selectedCategory !== 'all') params.append('skill_category', selectedCategory);
+    return params;
+  };
+
   const handleSearch = async () => {
     setLoading(true);
     try {
-      const params = new URLSearchParams();
-      if (searchQuery) params.append('query', searchQuery);
-      if (selectedCategory !== 'all') params.append('skill_category', selectedCategory);
-      
+      const params = searchParams();
       const response = await axios.get(`${API}/posts/search?${params.toString()}`);
       setPosts(response.data);
+      rememberNextPage('posts/search', params, response);
     } catch (error) {
       console.error('Failed to search posts:', error);
       toast.error('Failed to search posts');
@@ -66,6 +80,25 @@ export default function FeedPage() {
     }
   };
 
+  const handleLoadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    try {
+      // Continue the query that produced the cursor, not whatever is in the search box now
+      const { endpoint, cursor } = nextPage;
+      const params = new URLSearchParams(nextPage.params);
+      params.append('cursor', cursor);
+      const response = await axios.get(`${API}/${endpoint}?${params.toString()}`);
+      setPosts((current) => [...current, ...response.data]);
+      rememberNextPage(endpoint, new URLSearchParams(nextPage.params), response);
+    } catch (error) {
+      console.error('Failed to load more posts:', error);
+      toast.error('Failed to load more posts');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleValidate = async (postId) => {
     try {
       await axios.post(`${API}/posts/${postId}/validate`);
@@ -188,6 +221,19 @@ export default function FeedPage() {
                 onValidate={handleValidate}
               />
             ))}
+            {nextPage && (
+              <div className="text-center">
+                <Button
+                  onClick={handleLoadMore}
+                  disabled={loadingMore}
+                  variant="outline"
+                  className="h-11 px-8 rounded-full"
+                  data-testid="load-more-button"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </main>
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import Navbar from '@/components/Navbar';
+import { VIDEO_STATUS_MESSAGES } from '@/components/PostCard';
 import { Button } from '@/components/ui/button';
 import { toast } from 'sonner';
 import { ArrowLeft } from 'lucide-react';
@@ -90,15 +91,24 @@ export default function PostPage() {
           )}
 
           <div className="relative bg-black video-container" style={{ minHeight: '400px', maxHeight: '80vh' }}>
-            <video
-              src={`${BACKEND_URL}${post.video_url}`}
-              controls
-              autoPlay={false}
-              preload="metadata"
-              playsInline
-              className="w-full h-full"
-              data-testid="post-video"
-            />
+            {VIDEO_STATUS_MESSAGES[post.status] ? (
+              <div
+                className="absolute inset-0 flex items-center justify-center text-sm font-medium uppercase tracking-wider text-zinc-300"
+                data-testid="post-video-status"
+              >
+                {VIDEO_STATUS_MESSAGES[post.status]}
+              </div>
+            ) : (
+              <video
+                src={`${BACKEND_URL}${post.video_url}`}
+                controls
+                autoPlay={false}
+                preload="metadata"
+                playsInline
+                className="w-full h-full"
+                data-testid="post-video"
+              />
+            )}
           </div>
 
           <div className="p-6 space-y-6">
@@ -125,7 +135,7 @@ export default function PostPage() {
                 </p>
               </div>
 
-              {post.is_validated_by_me ? (
+              {VIDEO_STATUS_MESSAGES[post.status] ? null : post.is_validated_by_me ? (
                 <Button
                   disabled
                   className="h-12 px-8 rounded-full bg-zinc-100 text-zinc-500 font-bold uppercase tracking-wide cursor-not-allowed"
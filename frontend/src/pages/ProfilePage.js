@@ -18,6 +18,8 @@ export default function ProfilePage() {
   const navigate = useNavigate();
   const [profile, setProfile] = useState(null);
   const [posts, setPosts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [uploadingAvatar, setUploadingAvatar] = useState(false);
   const fileInputRef = useRef(null);
@@ -45,11 +47,28 @@ export default function ProfilePage() {
     try {
       const response = await axios.get(`${API}/users/${userId}/posts`);
       setPosts(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Failed to fetch posts:', error);
     }
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const params = new URLSearchParams({ cursor: nextCursor });
+      const response = await axios.get(`${API}/users/${userId}/posts?${params.toString()}`);
+      setPosts((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Failed to load more posts:', error);
+      toast.error('Failed to load more posts');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleValidate = async (postId) => {
     try {
       await axios.post(`${API}/posts/${postId}/validate`);
@@ -208,6 +227,19 @@ export default function ProfilePage() {
                 onValidate={handleValidate}
               />
             ))}
+            {nextCursor && (
+              <div className="text-center">
+                <Button
+                  onClick={handleLoadMore}
+                  disabled={loadingMore}
+                  variant="outline"
+                  className="h-11 px-8 rounded-full"
+                  data-testid="profile-load-more-button"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </main>
@@ -0,0 +1,49 @@
+"""Builders for small synthetic MP4 files used by the tests."""
+import struct
+
+
+def box(box_type: bytes, body: bytes) -> bytes:
+    return struct.pack(">I4s", len(body) + 8, box_type) + body
+
+
+def moov(duration_seconds: float, chunk_offsets=(), width: int = 1280, height: int = 720) -> bytes:
+    """A moov box with a movie header and one video track whose stco lists chunk_offsets."""
+    mvhd = box(b"mvhd", b"\0" * 12 + struct.pack(">II", 1000, int(duration_seconds * 1000)) + b"\0" * 80)
+    tkhd = box(b"tkhd", b"\0" * 76 + struct.pack(">II", width << 16, height << 16))
+    hdlr = box(b"hdlr", b"\0" * 8 + b"vide" + b"\0" * 12)
+    stco = box(b"stco", b"\0" * 4 + struct.pack(">I", len(chunk_offsets))
+               + b"".join(struct.pack(">I", offset) for offset in chunk_offsets))
+    stbl = box(b"stbl", stco)
+    trak = box(b"trak", tkhd + box(b"mdia", hdlr + box(b"minf", stbl)))
+    return box(b"moov", mvhd + trak)
+
+
+FTYP = box(b"ftyp", b"isom\0\0\0\0isomiso2")
+
+
+def moov_last_mp4(duration_seconds: float, media: bytes) -> bytes:
+    """ftyp, mdat, moov, with one chunk offset pointing at the start of the media."""
+    media_offset = len(FTYP) + 8
+    return FTYP + box(b"mdat", media) + moov(duration_seconds, [media_offset])
+
+
+def moov_first_mp4(duration_seconds: float, media: bytes) -> bytes:
+    """ftyp, moov, mdat, with one chunk offset pointing at the start of the media."""
+    moov_size = len(moov(duration_seconds, [0]))
+    media_offset = len(FTYP) + moov_size + 8
+    return FTYP + moov(duration_seconds, [media_offset]) + box(b"mdat", media)
+
+
+def ebml(element_id: int, body: bytes) -> bytes:
+    """An EBML element with an 8-byte size field."""
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big") + b"\x01" + len(body).to_bytes(7, "big") + body
+
+
+def webm(duration_seconds: float, width: int = 1280, height: int = 720, cluster: bytes = b"") -> bytes:
+    """EBML header and a segment with Info, one video track and a cluster."""
+    info = ebml(0x1549A966, ebml(0x2AD7B1, (1000000).to_bytes(3, "big"))
+                + ebml(0x4489, struct.pack(">d", duration_seconds * 1000)))
+    video = ebml(0xE0, ebml(0xB0, width.to_bytes(2, "big")) + ebml(0xBA, height.to_bytes(2, "big")))
+    tracks = ebml(0x1654AE6B, ebml(0xAE, ebml(0x83, b"\x01") + video))
+    header = ebml(0x1A45DFA3, ebml(0x4282, b"webm"))
+    return header + ebml(0x18538067, info + tracks + ebml(0x1F43B675, cluster))
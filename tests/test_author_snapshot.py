@@ -0,0 +1,63 @@
+"""Author snapshots embedded in posts."""
+import os
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+from server import (  # noqa: E402
+    AUTHOR_SNAPSHOT_FIELDS, AVATAR_LIST_VARIANT, DEFAULT_SKILL_CATEGORIES, author_snapshot, finish_hydration
+)
+
+USER = {
+    "id": "u1",
+    "email": "u1@example.com",
+    "display_name": "Ada",
+    "skill_category": "Cooking",
+    "avatar_url": "/uploads/avatars/u1/full.webp",
+    "avatar_urls": {AVATAR_LIST_VARIANT: "/uploads/avatars/u1/small.webp"},
+    "created_at": "2026-01-01T00:00:00+00:00",
+}
+
+
+def test_snapshot_holds_only_author_fields():
+    snapshot = author_snapshot({**USER, "password_hash": "secret", "validations_received": 4})
+
+    assert set(snapshot) == set(AUTHOR_SNAPSHOT_FIELDS) | {"rev"}
+    assert snapshot["avatar_url"] == USER["avatar_urls"][AVATAR_LIST_VARIANT]
+
+
+def test_rev_is_stable_for_the_same_profile():
+    assert author_snapshot(USER)["rev"] == author_snapshot(dict(reversed(list(USER.items()))))["rev"]
+    # Fields outside the snapshot don't change it
+    assert author_snapshot(USER)["rev"] == author_snapshot({**USER, "posts_count": 9})["rev"]
+
+
+@pytest.mark.parametrize("change", [
+    {"display_name": "Ada L."},
+    {"skill_category": "Music"},
+    {"avatar_urls": {AVATAR_LIST_VARIANT: "/uploads/avatars/u1/new.webp"}},
+    {"avatar_urls": None},
+    {"email": "ada@example.com"},
+])
+def test_rev_changes_with_any_embedded_field(change):
+    assert author_snapshot({**USER, **change})["rev"] != author_snapshot(USER)["rev"]
+
+
+def test_missing_category_gets_the_default():
+    snapshot = author_snapshot({**USER, "skill_category": None})
+
+    assert snapshot["skill_category"] == DEFAULT_SKILL_CATEGORIES[0]
+    assert snapshot["rev"] == author_snapshot({**USER, "skill_category": DEFAULT_SKILL_CATEGORIES[0]})["rev"]
+
+
+def test_hydration_exposes_the_snapshot_without_its_rev():
+    post = {"id": "p1", "user_id": "u1", "video_url": "/v.mp4", "status": "ready", "author": author_snapshot(USER)}
+
+    [hydrated] = finish_hydration([post])
+
+    assert "author" not in hydrated
+    assert "rev" not in hydrated["user"]
+    assert hydrated["user"]["display_name"] == "Ada"
+    assert {"posts_count", "validations_received"} <= set(hydrated["user"])
@@ -0,0 +1,60 @@
+"""Response versions, ETags and 304 handling."""
+import os
+
+import pytest
+from fastapi import Request, Response
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+from server import ResponseVersions, conditional_response  # noqa: E402
+
+
+def request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_etag_changes_when_its_scope_is_bumped():
+    versions = ResponseVersions()
+    feed, leaderboard = versions.etag("posts", "viewer-1"), versions.etag("leaderboard")
+
+    versions.bump("posts")
+
+    assert versions.etag("posts", "viewer-1") != feed
+    assert versions.etag("leaderboard") == leaderboard
+    assert versions.version("posts") == 1
+    assert versions.version("user:u1") == 0
+
+
+def test_etag_varies_with_its_arguments():
+    versions = ResponseVersions()
+
+    assert versions.etag("posts", "viewer-1", 20, None) != versions.etag("posts", "viewer-2", 20, None)
+    assert versions.etag("posts", "viewer-1", 20, None) != versions.etag("posts", "viewer-1", 20, "cursor")
+    assert versions.etag("posts", "viewer-1", 20, None) == versions.etag("posts", "viewer-1", 20, None)
+
+
+def test_etags_from_a_previous_process_do_not_match():
+    assert ResponseVersions().etag("posts") != ResponseVersions().etag("posts")
+
+
+@pytest.mark.parametrize("header", ['{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_matching_request_gets_304(header):
+    etag = ResponseVersions().etag("leaderboard")
+
+    not_modified = conditional_response(request(header.format(etag=etag)), Response(), etag, "public, no-cache")
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.headers["cache-control"] == "public, no-cache"
+
+
+@pytest.mark.parametrize("header", [None, "", '"stale"'])
+def test_other_requests_get_a_tagged_response(header):
+    etag = ResponseVersions().etag("posts", "viewer-1")
+    response = Response()
+
+    assert conditional_response(request(header), response, etag) is None
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "private, no-cache"
@@ -0,0 +1,107 @@
+"""CounterBuffer flushing, with bulk_increment stubbed out."""
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+import server  # noqa: E402
+from server import CounterBuffer  # noqa: E402
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Increments written by the stubbed bulk_increment, which takes 50ms."""
+    writes = []
+
+    async def slow_bulk_increment(increments):
+        await asyncio.sleep(0.05)
+        writes.append(increments)
+        return {}
+
+    monkeypatch.setattr(server, "bulk_increment", slow_bulk_increment)
+    return writes
+
+
+def totals(writes: list) -> dict:
+    result = {}
+    for increments in writes:
+        for collection, docs in increments.items():
+            for doc_id, fields in docs.items():
+                for field, delta in fields.items():
+                    key = (collection, doc_id, field)
+                    result[key] = result.get(key, 0) + delta
+    return result
+
+
+def test_pending_deltas_are_merged_into_reads():
+    buffer = CounterBuffer(60, 100)
+    buffer.add("posts", "p1", "validation_count")
+    buffer.add("posts", "p1", "validation_count")
+
+    assert buffer.apply("posts", {"id": "p1", "validation_count": 3})["validation_count"] == 5
+    assert buffer.apply("posts", {"id": "p2"}) == {"id": "p2"}
+
+
+def test_stop_during_a_flush_loses_nothing(applied):
+    async def scenario():
+        buffer = CounterBuffer(0.01, 100)
+        buffer.start()
+        buffer.add("posts", "p1", "validation_count")
+        buffer.add("users", "u1", "validations_received", 2)
+        # Let the loop start its flush, then stop while it is writing
+        await asyncio.sleep(0.03)
+        assert buffer._inflight
+        buffer.add("posts", "p1", "validation_count")
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+
+    assert totals(applied) == {
+        ("posts", "p1", "validation_count"): 2,
+        ("users", "u1", "validations_received"): 2,
+    }
+    assert not buffer._pending and not buffer._inflight
+
+
+def test_cancelled_flush_requeues_its_increments(applied):
+    async def scenario():
+        buffer = CounterBuffer(60, 100)
+        buffer.add("posts", "p1", "validation_count", 3)
+        flush = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        return buffer
+
+    buffer = asyncio.run(scenario())
+
+    assert buffer.pending("posts", "p1") == {"validation_count": 3}
+    assert not buffer._inflight
+
+
+def test_failed_increments_are_retried(monkeypatch):
+    calls = []
+
+    async def partly_failing(increments):
+        calls.append(increments)
+        return {"users": increments["users"]} if len(calls) == 1 else {}
+
+    monkeypatch.setattr(server, "bulk_increment", partly_failing)
+
+    async def scenario():
+        buffer = CounterBuffer(60, 100)
+        buffer.add("posts", "p1", "validation_count")
+        buffer.add("users", "u1", "validations_received")
+        await buffer.flush()
+        assert buffer.pending("users", "u1") == {"validations_received": 1}
+        assert buffer.pending("posts", "p1") == {}
+        await buffer.flush()
+
+    asyncio.run(scenario())
+
+    assert calls[1] == {"users": {"u1": {"validations_received": 1}}}
@@ -0,0 +1,55 @@
+"""Keyset pagination cursors."""
+import base64
+import os
+
+import pytest
+from fastapi import HTTPException
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+from server import decode_cursor, encode_cursor  # noqa: E402
+
+POST = {"id": "5f0c-post", "created_at": "2026-03-01T12:00:00+00:00", "title": "ignored"}
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(POST)
+
+    assert decode_cursor(cursor) == {"created_at": POST["created_at"], "id": POST["id"], "score": None}
+
+
+def test_ranked_cursor_carries_the_score():
+    cursor = encode_cursor(POST, score=2.75)
+
+    assert decode_cursor(cursor, ranked=True)["score"] == 2.75
+    # A plain page ignores the score
+    assert decode_cursor(cursor)["score"] is None
+
+
+def test_cursor_is_url_safe_and_unpadded():
+    cursor = encode_cursor({"id": "?" * 7, "created_at": ">" * 11})
+
+    assert "=" not in cursor
+    assert all(char.isalnum() or char in "-_" for char in cursor)
+    assert decode_cursor(cursor)["id"] == "?" * 7
+
+
+def b64(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+@pytest.mark.parametrize("cursor, ranked", [
+    ("not a cursor", False),
+    ("", False),
+    (b64("[1, 2]"), False),
+    (b64('{"c": "2026-01-01"}'), False),
+    (b64('{"c": 5, "i": "p1"}'), False),
+    (b64('{"c": "2026-01-01", "i": null}'), False),
+    (encode_cursor(POST), True),
+    (b64('{"c": "2026-01-01", "i": "p1", "s": "high"}'), True),
+])
+def test_invalid_cursors_are_rejected(cursor, ranked):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, ranked=ranked)
+    assert error.value.status_code == 400
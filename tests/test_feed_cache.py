@@ -0,0 +1,146 @@
+"""FeedCache coalescing and invalidation, with page builds stubbed out."""
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+import server  # noqa: E402
+from server import FeedCache, ResponseVersions  # noqa: E402
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    versions = ResponseVersions()
+    monkeypatch.setattr(server, "response_versions", versions)
+    return versions
+
+
+@pytest.fixture
+def overlays(monkeypatch):
+    """Viewers whose validation status was overlaid on a shared page."""
+    viewers = []
+
+    async def overlay(posts, viewer_id):
+        viewers.append(viewer_id)
+        return [{**post, "is_validated_by_me": False} for post in posts]
+
+    monkeypatch.setattr(server, "overlay_validations", overlay)
+    return viewers
+
+
+def stub_builds(cache: FeedCache, delay: float = 0.01, fail: bool = False) -> list:
+    """Make cache build pages without Mongo; returns the (cursor, viewer) of every build."""
+    builds = []
+
+    async def build(limit, cursor, selection, viewer_id):
+        builds.append((cursor, viewer_id))
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("database unavailable")
+        return [{"id": f"post-{len(builds)}", "is_validated_by_me": True}], "next"
+
+    cache._build = build
+    return builds
+
+
+def test_concurrent_misses_share_one_build(versions, overlays):
+    cache = FeedCache(10)
+    builds = stub_builds(cache)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_page(20, None, None, f"viewer-{i}") for i in range(3)))
+
+    pages = asyncio.run(scenario())
+
+    assert builds == [(None, "viewer-0")]
+    assert [posts[0]["id"] for posts, _ in pages] == ["post-1"] * 3
+    # The viewer that built the page already has their own status
+    assert pages[0][0][0]["is_validated_by_me"] is True
+    assert overlays == ["viewer-1", "viewer-2"]
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 2
+
+
+def test_pages_are_cached_until_the_posts_version_changes(versions, overlays):
+    cache = FeedCache(10)
+    builds = stub_builds(cache)
+
+    async def scenario():
+        first = await cache.get_page(20, None, None, "viewer-1")
+        again = await cache.get_page(20, None, None, "viewer-2")
+        other_page = await cache.get_page(20, "cursor", None, "viewer-2")
+        versions.bump("posts")
+        rebuilt = await cache.get_page(20, None, None, "viewer-2")
+        return first, again, other_page, rebuilt
+
+    first, again, other_page, rebuilt = asyncio.run(scenario())
+
+    assert again[0][0]["id"] == first[0][0]["id"] == "post-1"
+    assert other_page[0][0]["id"] == "post-2"
+    assert rebuilt[0][0]["id"] == "post-3"
+    assert builds == [(None, "viewer-1"), ("cursor", "viewer-2"), (None, "viewer-2")]
+    assert cache.stats()["hits"] == 1
+
+
+def test_page_built_across_a_version_change_is_not_cached(versions, overlays):
+    cache = FeedCache(10)
+    builds = stub_builds(cache, delay=0.05)
+
+    async def scenario():
+        building = asyncio.create_task(cache.get_page(20, None, None, "viewer-1"))
+        await asyncio.sleep(0.01)
+        versions.bump("posts")
+        await building
+        await cache.get_page(20, None, None, "viewer-1")
+
+    asyncio.run(scenario())
+
+    assert len(builds) == 2
+
+
+def test_cancelled_request_does_not_cancel_a_shared_build(versions, overlays):
+    cache = FeedCache(10)
+    builds = stub_builds(cache, delay=0.05)
+
+    async def scenario():
+        first = asyncio.create_task(cache.get_page(20, None, None, "viewer-1"))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(cache.get_page(20, None, None, "viewer-2"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    posts, next_cursor = asyncio.run(scenario())
+
+    assert posts[0]["id"] == "post-1" and next_cursor == "next"
+    assert len(builds) == 1
+
+
+def test_failed_builds_are_not_cached(versions, overlays):
+    cache = FeedCache(10)
+    builds = stub_builds(cache, fail=True)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.get_page(20, None, None, "viewer-1")
+
+    asyncio.run(scenario())
+
+    assert len(builds) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_pages_are_evicted(versions, overlays):
+    cache = FeedCache(2)
+    builds = stub_builds(cache, delay=0)
+
+    async def scenario():
+        for cursor in ("a", "b", "a", "c", "a", "b"):
+            await cache.get_page(20, cursor, None, "viewer-1")
+
+    asyncio.run(scenario())
+
+    assert [cursor for cursor, _ in builds] == ["a", "b", "c", "b"]
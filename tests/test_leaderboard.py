@@ -0,0 +1,87 @@
+"""In-memory Leaderboard ranking."""
+import os
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+from server import AVATAR_LIST_VARIANT, DEFAULT_SKILL_CATEGORIES, Leaderboard  # noqa: E402
+
+
+def user(user_id: str, received: int, category: str = "Cooking", **fields) -> dict:
+    return {"id": user_id, "display_name": user_id.upper(), "skill_category": category,
+            "validations_received": received, "posts_count": 1, **fields}
+
+
+def board(*users) -> Leaderboard:
+    leaderboard = Leaderboard()
+    for entry in users:
+        leaderboard.upsert(entry)
+    return leaderboard
+
+
+def ids(entries) -> list:
+    return [entry["id"] for entry in entries]
+
+
+def test_top_orders_by_validations_then_id():
+    leaderboard = board(user("b", 5), user("a", 5), user("c", 9), user("d", 0, "Music"))
+
+    assert ids(leaderboard.top(10)) == ["c", "a", "b", "d"]
+    assert ids(leaderboard.top(2)) == ["c", "a"]
+    assert ids(leaderboard.top(10, "Music")) == ["d"]
+    assert leaderboard.top(10, "Unknown") == []
+
+
+def test_equal_scores_share_a_rank():
+    leaderboard = board(user("a", 9), user("b", 5), user("c", 5), user("d", 1))
+
+    assert [leaderboard.rank(user_id)["rank"] for user_id in "abcd"] == [1, 2, 2, 4]
+    assert leaderboard.rank("d")["total"] == 4
+    assert leaderboard.rank("missing") is None
+
+
+def test_increment_moves_a_user_up():
+    leaderboard = board(user("a", 3), user("b", 2))
+
+    leaderboard.increment("b", "validations_received", 2)
+
+    assert ids(leaderboard.top(10)) == ["b", "a"]
+    assert leaderboard.rank("b")["rank"] == 1
+    assert leaderboard.counters("b") == {"posts_count": 1, "validations_received": 4}
+    leaderboard.increment("missing", "validations_received")
+    assert leaderboard.counters("missing") == {"posts_count": 0, "validations_received": 0}
+
+
+def test_changing_category_moves_the_user_between_rankings():
+    leaderboard = board(user("a", 3, "Cooking"), user("b", 2, "Cooking"))
+
+    leaderboard.update("a", skill_category="Music")
+
+    assert ids(leaderboard.top(10, "Cooking")) == ["b"]
+    assert ids(leaderboard.top(10, "Music")) == ["a"]
+    assert leaderboard.rank("a", "Cooking") is None
+    assert leaderboard.rank("a", "Music")["rank"] == 1
+    assert leaderboard.rank("b", "Cooking") == {
+        "rank": 1, "total": 1, "skill_category": "Cooking", "user": leaderboard.top(1, "Cooking")[0]
+    }
+    # The global ranking holds each user once
+    assert ids(leaderboard.top(10)) == ["a", "b"]
+
+
+def test_upsert_fills_defaults_and_prefers_the_small_avatar():
+    leaderboard = board({"id": "a", "display_name": "A", "avatar_url": "/full.webp",
+                         "avatar_urls": {AVATAR_LIST_VARIANT: "/sm.webp", "lg": "/lg.webp"}})
+
+    [entry] = leaderboard.top(1)
+    assert entry["skill_category"] == DEFAULT_SKILL_CATEGORIES[0]
+    assert entry["validations_received"] == entry["posts_count"] == 0
+    assert entry["avatar_url"] == "/sm.webp"
+    assert "avatar_urls" not in entry
+
+
+def test_top_returns_copies():
+    leaderboard = board(user("a", 1))
+
+    leaderboard.top(1)[0]["validations_received"] = 100
+
+    assert leaderboard.counters("a")["validations_received"] == 1
@@ -0,0 +1,169 @@
+"""Unit tests for the pure MP4/WebM helpers in media.py."""
+import struct
+
+import pytest
+
+import media
+from media import MediaError, VideoInspector, faststart, scan_top_level_boxes
+from tests.media_files import FTYP, box, moov, moov_first_mp4, moov_last_mp4, webm
+
+MEDIA = b"first-chunk" + bytes(range(256)) * 4
+
+
+def chunk_offsets(path, table: bytes = b"stco") -> list:
+    """Chunk offsets of the single track in the file at path."""
+    data = path.read_bytes()
+    start = data.index(table) + 4
+    count = struct.unpack_from(">I", data, start + 4)[0]
+    fmt, size = (">Q", 8) if table == b"co64" else (">I", 4)
+    return [struct.unpack_from(fmt, data, start + 8 + i * size)[0] for i in range(count)]
+
+
+def test_faststart_moves_moov_ahead_of_mdat(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(moov_last_mp4(30, MEDIA))
+    original_size = path.stat().st_size
+
+    assert faststart(path) is True
+
+    boxes = scan_top_level_boxes(path)
+    assert [box_type for box_type, _, _ in boxes] == [b"ftyp", b"moov", b"mdat"]
+    assert path.stat().st_size == original_size
+    # The chunk offset follows the media data to its new position
+    [offset] = chunk_offsets(path)
+    assert path.read_bytes()[offset:offset + len(MEDIA)] == MEDIA
+
+
+def test_faststart_keeps_offsets_before_mdat(tmp_path):
+    data = moov_last_mp4(30, MEDIA)
+    # Point a second chunk into the ftyp box, which does not move
+    path = tmp_path / "clip.mp4"
+    moov_at = data.rindex(b"moov") - 4
+    path.write_bytes(data[:moov_at] + moov(30, [len(FTYP) + 8, 4]))
+
+    faststart(path)
+
+    offsets = chunk_offsets(path)
+    assert offsets[1] == 4
+    assert path.read_bytes()[offsets[0]:offsets[0] + len(MEDIA)] == MEDIA
+
+
+def test_faststart_upgrades_stco_to_co64_when_offsets_overflow(tmp_path, monkeypatch):
+    # Shrink the 32-bit limit so the shifted offset no longer fits an stco entry
+    monkeypatch.setattr(media, "MAX_STCO_OFFSET", len(FTYP) + 8 + 10)
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(moov_last_mp4(30, MEDIA))
+
+    assert faststart(path) is True
+
+    data = path.read_bytes()
+    assert b"stco" not in data
+    [offset] = chunk_offsets(path, b"co64")
+    assert data[offset:offset + len(MEDIA)] == MEDIA
+    assert [box_type for box_type, _, _ in scan_top_level_boxes(path)] == [b"ftyp", b"moov", b"mdat"]
+
+
+def test_faststart_leaves_faststart_files_alone(tmp_path):
+    path = tmp_path / "clip.mp4"
+    data = moov_first_mp4(30, MEDIA)
+    path.write_bytes(data)
+
+    assert faststart(path) is False
+    assert path.read_bytes() == data
+
+
+@pytest.mark.parametrize("data", [
+    b"\x1a\x45\xdf\xa3" + b"\0" * 60,
+    FTYP + box(b"mdat", MEDIA),
+    FTYP + box(b"mdat", MEDIA)[:-10],
+])
+def test_faststart_rejects_files_it_cannot_rewrite(tmp_path, data):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(data)
+
+    with pytest.raises(MediaError):
+        faststart(path)
+    assert path.read_bytes() == data
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def inspect(data: bytes, max_bytes: int = 10 * 1024 * 1024, max_duration_seconds: float = 60,
+            chunk_size: int = 7) -> dict:
+    inspector = VideoInspector(max_bytes, max_duration_seconds)
+    for start in range(0, len(data), chunk_size):
+        inspector.feed(data[start:start + chunk_size])
+    return inspector.finish()
+
+
+@pytest.mark.parametrize("data", [moov_first_mp4(30, MEDIA), moov_last_mp4(30, MEDIA)])
+def test_inspector_reads_mp4_metadata(data):
+    metadata = inspect(data)
+
+    assert metadata["container"] == "mp4"
+    assert metadata["duration_seconds"] == 30
+    assert (metadata["width"], metadata["height"]) == (1280, 720)
+    assert metadata["bitrate"] == int(len(data) * 8 / 30)
+
+
+def test_inspector_rejects_overlong_video_while_streaming():
+    data = moov_first_mp4(90, MEDIA)
+    moov_end = len(FTYP) + len(moov(90, [0]))
+    inspector = VideoInspector(10 * 1024 * 1024, 60)
+    inspector.feed(data[:moov_end - 1])
+
+    # Rejected as soon as the moov box is complete, before any media data
+    with pytest.raises(MediaError, match="longer than 60"):
+        inspector.feed(data[moov_end - 1:moov_end + 1])
+
+
+def test_inspector_allows_rounding_tolerance_on_duration():
+    assert inspect(moov_first_mp4(60.5, MEDIA))["duration_seconds"] == 60.5
+
+
+def test_inspector_rejects_oversized_stream():
+    data = moov_last_mp4(30, MEDIA)
+    inspector = VideoInspector(500, 60)
+
+    with pytest.raises(MediaError, match="size limit"):
+        for start in range(0, len(data), 100):
+            inspector.feed(data[start:start + 100])
+    # Stopped at the first chunk past the limit, long before the moov box
+    assert inspector.total_bytes == 600
+
+
+@pytest.mark.parametrize("data", [
+    moov_first_mp4(30, MEDIA)[:-10],
+    moov_last_mp4(30, MEDIA)[:-10],
+    moov_last_mp4(30, MEDIA)[:len(FTYP) + 100],
+    FTYP[:6],
+    webm(30)[:40],
+])
+def test_inspector_rejects_truncated_input(data):
+    with pytest.raises(MediaError, match="Truncated|malformed"):
+        inspect(data)
+
+
+@pytest.mark.parametrize("data", [b"GIF89a" + b"\0" * 100, FTYP[:4] + b"\xff\xfe\xfd\xfc" + b"\0" * 100])
+def test_inspector_rejects_unknown_containers(data):
+    with pytest.raises(MediaError):
+        inspect(data)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_inspector_reads_webm_duration_and_resolution(chunk_size):
+    data = webm(42.5, width=640, height=360, cluster=b"\0" * 500)
+
+    metadata = inspect(data, chunk_size=chunk_size)
+
+    assert metadata["container"] == "webm"
+    assert metadata["duration_seconds"] == pytest.approx(42.5)
+    assert (metadata["width"], metadata["height"]) == (640, 360)
+
+
+def test_inspector_rejects_overlong_webm_from_its_header():
+    data = webm(90, cluster=b"\0" * 500)
+    header_end = data.index(b"\x1f\x43\xb6\x75")
+    inspector = VideoInspector(10 * 1024 * 1024, 60)
+
+    with pytest.raises(MediaError, match="longer than 60"):
+        inspector.feed(data[:header_end])
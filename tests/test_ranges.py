@@ -0,0 +1,82 @@
+"""parse_range_header edge cases (RFC 9110 byte ranges)."""
+import os
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+from server import MAX_RANGES_PER_REQUEST, parse_range_header  # noqa: E402
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=900-", [(900, 999)]),
+    ("bytes=900-5000", [(900, 999)]),
+    ("BYTES = 10-19", [(10, 19)]),
+])
+def test_plain_ranges(header, expected):
+    assert parse_range_header(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=-500", [(500, 999)]),
+    ("bytes=-1", [(999, 999)]),
+    ("bytes=-5000", [(0, 999)]),
+])
+def test_suffix_ranges(header, expected):
+    assert parse_range_header(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99,50-149", [(0, 149)]),
+    ("bytes=0-99,100-199", [(0, 199)]),
+    ("bytes=500-599,0-99", [(0, 99), (500, 599)]),
+    ("bytes=0-499,100-199,-600", [(0, 999)]),
+    ("bytes=0-9,,20-29", [(0, 9), (20, 29)]),
+])
+def test_overlapping_and_adjacent_ranges_are_coalesced(header, expected):
+    assert parse_range_header(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", SIZE),
+    ("bytes=1000-2000", SIZE),
+    ("bytes=-0", SIZE),
+    ("bytes=-10", 0),
+    ("bytes=0-10", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    assert parse_range_header(header, size) == []
+
+
+def test_unsatisfiable_parts_are_dropped_from_a_satisfiable_set():
+    assert parse_range_header("bytes=2000-,0-9", SIZE) == [(0, 9)]
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-99",
+    "bytes=",
+    "bytes=,",
+    "bytes=-",
+    "bytes=abc",
+    "bytes=5-2",
+    "bytes=0-99,5-2",
+    "bytes=a-9",
+    "bytes=0-9z",
+    "bytes=--5",
+    "bytes=5",
+    "0-99",
+])
+def test_malformed_ranges_are_ignored(header):
+    assert parse_range_header(header, SIZE) is None
+
+
+def test_too_many_ranges_are_ignored():
+    within = ",".join(f"{i * 10}-{i * 10}" for i in range(MAX_RANGES_PER_REQUEST))
+    over = ",".join(f"{i * 10}-{i * 10}" for i in range(MAX_RANGES_PER_REQUEST + 1))
+
+    assert len(parse_range_header(f"bytes={within}", SIZE)) == MAX_RANGES_PER_REQUEST
+    assert parse_range_header(f"bytes={over}", SIZE) is None
@@ -0,0 +1,64 @@
+"""Search pipeline and field selection, built without a database."""
+import os
+
+import pytest
+from fastapi import HTTPException
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "skillproof_test")
+
+from server import (  # noqa: E402
+    encode_cursor, parse_field_selection, posts_projection, search_pipeline
+)
+
+
+def project_stage(pipeline: list) -> dict:
+    [stage] = [stage["$project"] for stage in pipeline if "$project" in stage]
+    return stage
+
+
+def test_full_view_search_keeps_whole_documents():
+    projection = project_stage(search_pipeline("guitar", {}, 20, None, posts_projection(None)))
+
+    # An exclusion projection; search_score added by $addFields survives it
+    assert projection == {"_id": 0}
+
+
+def test_full_view_search_without_author():
+    projection = project_stage(search_pipeline("guitar", {}, 20, None, posts_projection(None, include_author=False)))
+
+    assert projection == {"_id": 0, "author": 0}
+
+
+def test_lite_view_search_projects_the_score():
+    selection = parse_field_selection(None, "lite")
+    projection = project_stage(search_pipeline("guitar", {}, 20, None, posts_projection(selection)))
+
+    assert projection["search_score"] == 1
+    assert projection["id"] == projection["created_at"] == 1
+    assert projection["author.display_name"] == 1
+
+
+def test_search_pipeline_seeks_past_the_cursor():
+    cursor = encode_cursor({"created_at": "2026-01-01T00:00:00", "id": "p1"}, score=1.5)
+    pipeline = search_pipeline("guitar", {"status": "ready"}, 20, cursor)
+
+    assert pipeline[0]["$match"]["status"] == "ready"
+    seek = pipeline[2]["$match"]["$or"]
+    assert seek[0] == {"search_score": {"$lt": 1.5}}
+    assert {"$limit": 21} in pipeline
+
+
+@pytest.mark.parametrize("fields", ["title,", "title,,description", ",title", " title , "])
+def test_field_selection_skips_empty_parts(fields):
+    names = [name for name, _ in parse_field_selection(fields, None)[0]]
+
+    assert names[0] == "id"
+    assert "title" in names
+    assert "" not in names
+
+
+def test_field_selection_rejects_unknown_fields():
+    with pytest.raises(HTTPException) as error:
+        parse_field_selection("title,nope", None)
+    assert error.value.status_code == 400
@@ -0,0 +1,180 @@
+"""S3Storage against moto's in-memory S3, no network or credentials needed."""
+import asyncio
+import struct
+
+import boto3
+import cloudinary
+import pytest
+import requests
+from moto import mock_aws
+
+from media import MediaError, inspect_ranges
+from storage import (
+    S3_MIN_PART_BYTES, CloudinaryStorage, LocalStorage, S3Storage, StorageBackend, StorageError
+)
+
+BUCKET = "videos"
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def storage(s3_client):
+    return S3Storage(s3_client, BUCKET, key_prefix="skillproof/videos",
+                     public_base_url="https://cdn.example.com", part_size=S3_MIN_PART_BYTES)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def stored(client, key: str) -> dict:
+    return client.get_object(Bucket=BUCKET, Key=f"skillproof/videos/{key}")
+
+
+def test_upload_small_file_in_one_request(storage, s3_client, tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"small video")
+
+    url = run(storage.upload(path, "post-1.mp4"))
+
+    assert url == "https://cdn.example.com/skillproof/videos/post-1.mp4"
+    obj = stored(s3_client, "post-1.mp4")
+    assert obj["Body"].read() == b"small video"
+    assert obj["ContentType"] == "video/mp4"
+
+
+def test_upload_large_file_as_multipart(storage, s3_client, tmp_path):
+    data = bytes(range(256)) * (S3_MIN_PART_BYTES * 2 // 256 + 1000)
+    path = tmp_path / "clip.webm"
+    path.write_bytes(data)
+
+    run(storage.upload(path, "post-2.webm"))
+
+    obj = stored(s3_client, "post-2.webm")
+    assert obj["Body"].read() == data
+    assert obj["ContentType"] == "video/webm"
+    # Multipart ETags carry the part count
+    assert obj["ETag"].strip('"').endswith("-3")
+    assert not s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+
+
+def test_direct_upload_single_put(storage):
+    data = b"\x00" * 1000
+    upload = run(storage.create_direct_upload("post-3.mp4", "video/mp4", len(data)))
+
+    assert upload["upload_id"] is None
+    response = requests.put(upload["url"], data=data, headers=upload["headers"])
+    assert response.status_code == 200
+
+    assert run(storage.complete_direct_upload("post-3.mp4", None, [])) == len(data)
+    assert run(storage.read_range("post-3.mp4", 10, 20)) == data[10:30]
+
+
+def test_direct_upload_multipart(storage, s3_client):
+    data = b"\x01" * (S3_MIN_PART_BYTES + 1234)
+    upload = run(storage.create_direct_upload("post-4.mp4", "video/mp4", len(data)))
+
+    assert upload["upload_id"]
+    assert [part["part_number"] for part in upload["parts"]] == [1, 2]
+    parts = []
+    for part in reversed(upload["parts"]):
+        start = (part["part_number"] - 1) * upload["part_size"]
+        response = requests.put(part["url"], data=data[start:start + upload["part_size"]])
+        parts.append({"part_number": part["part_number"], "etag": response.headers["ETag"]})
+
+    size = run(storage.complete_direct_upload("post-4.mp4", upload["upload_id"], parts))
+
+    assert size == len(data)
+    assert stored(s3_client, "post-4.mp4")["Body"].read() == data
+
+
+def test_complete_direct_upload_rejects_missing_object(storage):
+    upload = run(storage.create_direct_upload("post-5.mp4", "video/mp4", 100))
+
+    with pytest.raises(StorageError):
+        run(storage.complete_direct_upload("post-5.mp4", upload["upload_id"], []))
+
+
+def test_abort_direct_upload_removes_parts_and_object(storage, s3_client):
+    upload = run(storage.create_direct_upload("post-6.mp4", "video/mp4", S3_MIN_PART_BYTES * 2))
+    requests.put(upload["parts"][0]["url"], data=b"\x02" * S3_MIN_PART_BYTES)
+
+    run(storage.abort_direct_upload("post-6.mp4", upload["upload_id"]))
+
+    assert not s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=BUCKET)
+
+
+def box(box_type: bytes, body: bytes) -> bytes:
+    return struct.pack(">I4s", len(body) + 8, box_type) + body
+
+
+def moov_last_mp4(duration_seconds: int, media_bytes: int) -> bytes:
+    mvhd = box(b"mvhd", b"\0" * 12 + struct.pack(">II", 1000, duration_seconds * 1000) + b"\0" * 80)
+    tkhd = box(b"tkhd", b"\0" * 76 + struct.pack(">II", 1280 << 16, 720 << 16))
+    hdlr = box(b"hdlr", b"\0" * 8 + b"vide" + b"\0" * 12)
+    trak = box(b"trak", tkhd + box(b"mdia", hdlr))
+    return box(b"ftyp", b"isom\0\0\0\0isom") + box(b"mdat", b"\0" * media_bytes) + box(b"moov", mvhd + trak)
+
+
+def test_inspect_stored_video_with_ranged_reads(storage, s3_client):
+    data = moov_last_mp4(30, media_bytes=S3_MIN_PART_BYTES)
+    s3_client.put_object(Bucket=BUCKET, Key="skillproof/videos/post-7.mp4", Body=data)
+    fetched = []
+
+    async def read_range(start, length):
+        chunk = await storage.read_range("post-7.mp4", start, length)
+        fetched.append(len(chunk))
+        return chunk
+
+    metadata = run(inspect_ranges(read_range, len(data), len(data), 60))
+
+    assert metadata["duration_seconds"] == 30
+    assert (metadata["width"], metadata["height"]) == (1280, 720)
+    # Box headers and the moov box only, never the media data
+    assert sum(fetched) < 1024
+
+    with pytest.raises(MediaError):
+        run(inspect_ranges(read_range, len(data), len(data), 10))
+
+
+def test_storage_backends_must_implement_the_interface():
+    class Incomplete(StorageBackend):
+        async def upload(self, path, key):
+            return key
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_backends_build_public_urls(storage, tmp_path):
+    local = LocalStorage(tmp_path, "/uploads/fake-cloud/")
+    cloudinary.config(cloud_name="demo")
+
+    assert local.public_url("post-8.mp4") == "/uploads/fake-cloud/post-8.mp4"
+    assert storage.public_url("post-8.mp4") == "https://cdn.example.com/skillproof/videos/post-8.mp4"
+    assert CloudinaryStorage().public_url("post-8.mp4").endswith("/video/upload/v1/skillproof/videos/skillproof/post-8.mp4")
+
+
+def test_delete_removes_published_files(storage, s3_client, tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"video")
+    local = LocalStorage(tmp_path / "published", "/uploads")
+
+    run(local.upload(path, "post-9.mp4"))
+    run(storage.upload(path, "post-9.mp4"))
+    run(local.delete("post-9.mp4"))
+    run(storage.delete("post-9.mp4"))
+    run(local.delete("post-9.mp4"))
+
+    assert not (tmp_path / "published" / "post-9.mp4").exists()
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=BUCKET)